@@ -4,9 +4,15 @@ from baidusearch.baidusearch import search
 
 from src.chat.focus_chat.planners.actions.plugin_action import PluginAction, register_action
 from src.common.logger_manager import get_logger
+from .circuit_breaker import get_breaker
+from .result_cache import normalize_query
+from .result_store import get_result_store
 
 logger = get_logger("baidu_action")
 
+# 熔断器使用的站点名
+BAIDU_HOST = "www.baidu.com"
+
 @register_action
 class BaiduSearchAction(PluginAction):
     """执行百度搜索的动作处理类"""
@@ -55,7 +61,26 @@ class BaiduSearchAction(PluginAction):
     def _baidu_search(self, query: str, num_results: int) -> Dict[str, Any]:
         """执行百度搜索"""
         try:
-            results = search(query, num_results=num_results)
+            store = get_result_store()
+            store_key = f"{num_results}|{normalize_query(query)}"
+            if store:
+                cached = store.get("baidu", store_key)
+                if cached is not None:
+                    return cached
+
+            # 站点熔断中时直接返回失败，不再发请求
+            breaker = get_breaker(BAIDU_HOST)
+            if not breaker.allow():
+                return {
+                    "success": False,
+                    "results": f"百度搜索暂时不可用，约 {breaker.retry_after():.0f} 秒后重试"
+                }
+            try:
+                results = search(query, num_results=num_results)
+            except Exception:
+                breaker.record_failure()
+                raise
+            breaker.record_success()
             
             formatted_results = []
             for item in results:
@@ -65,10 +90,13 @@ class BaiduSearchAction(PluginAction):
                     'snippet': item.get('abstract', '')
                 })
             
-            return {
+            result_data = {
                 "success": True,
                 "results": formatted_results
             }
+            if store and formatted_results:
+                store.set("baidu", store_key, result_data)
+            return result_data
             
         except Exception as e:
             logger.error(f"{self.log_prefix} 百度搜索出错: {traceback.format_exc()}")
@@ -0,0 +1,778 @@
+"""
+必应搜索引擎
+
+bing_search（工具）与 bing_search_tool（Action 使用）共用的抓取与解析引擎：
+- 通过 http_client 的共享 aiohttp 会话抓取，支持对冲请求国际版与中国版必应
+- 结果提取由可插拔的策略完成，按顺序尝试直到某个策略提取到结果
+- 记录每个策略的命中情况，下次优先尝试上一次成功的策略，常见情况只需一次选择器匹配
+- 默认先请求精简的 RSS（format=rss），RSS 为空时再抓取完整的 HTML 结果页
+- 所有策略得到的 /ck/a 跟踪跳转链接都在本地解码为真实地址，规范化后去重
+"""
+
+import asyncio
+import importlib.util
+import math
+import random
+import threading
+import traceback
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+from bs4 import BeautifulSoup
+
+from src.common.logger import get_logger
+
+from .bing_parser import (
+    ABSTRACT_MAX_LENGTH,
+    STREAM_CHUNK_SIZE,
+    StreamingBingParser,
+    StreamingBingRssParser,
+    clean_result_url,
+    parse_bing_html,
+)
+from .circuit_breaker import get_breaker, host_of
+from .http_client import fetch_url
+from .diagnostics import get_diagnostics, is_debug_enabled
+
+logger = get_logger("bing_engine")
+
+user_agents = [
+    # Edge浏览器
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36 Edg/122.0.0.0',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36 Edg/121.0.0.0',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36 Edg/122.0.0.0',
+
+    # Chrome浏览器
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
+
+    # Firefox浏览器
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:123.0) Gecko/20100101 Firefox/123.0',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:123.0) Gecko/20100101 Firefox/123.0',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:122.0) Gecko/20100101 Firefox/122.0',
+
+    # Safari浏览器
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.6 Safari/605.1.15',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Safari/605.1.15',
+
+    # 移动端浏览器
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Mobile/15E148 Safari/604.1',
+    'Mozilla/5.0 (iPad; CPU OS 17_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Mobile/15E148 Safari/604.1',
+    'Mozilla/5.0 (Linux; Android 14; SM-S918B) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Mobile Safari/537.36',
+
+    # 搜索引擎爬虫 (模拟)
+    'Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)',
+    'Mozilla/5.0 (compatible; Bingbot/2.0; +http://www.bing.com/bingbot.htm)',
+    'Mozilla/5.0 (compatible; YandexBot/3.0; +http://yandex.com/bots)'
+]
+
+# aiohttp 只有在安装了 brotli 或 brotlicffi 时才能解压 br 编码的响应，否则不声明支持 br
+BROTLI_AVAILABLE = any(importlib.util.find_spec(name) is not None for name in ("brotli", "brotlicffi"))
+ACCEPT_ENCODING = "gzip, deflate, br" if BROTLI_AVAILABLE else "gzip, deflate"
+
+# 请求头信息
+HEADERS = {
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
+    "Accept-Encoding": ACCEPT_ENCODING,
+    "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8,en-GB;q=0.7,en-US;q=0.6",
+    "Cache-Control": "max-age=0",
+    "Connection": "keep-alive",
+    "Host": "www.bing.com",
+    "Referer": "https://www.bing.com/",
+    "Sec-Ch-Ua": "\"Chromium\";v=\"122\", \"Microsoft Edge\";v=\"122\", \"Not-A.Brand\";v=\"99\"",
+    "Sec-Ch-Ua-Mobile": "?0",
+    "Sec-Ch-Ua-Platform": "\"Windows\"",
+    "Sec-Fetch-Dest": "document",
+    "Sec-Fetch-Mode": "navigate",
+    "Sec-Fetch-Site": "same-origin",
+    "Sec-Fetch-User": "?1",
+    "Upgrade-Insecure-Requests": "1",
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36 Edg/122.0.0.0"
+}
+
+# 替代的中国区必应请求头
+CN_BING_HEADERS = {
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
+    "Accept-Encoding": ACCEPT_ENCODING,
+    "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8,en-GB;q=0.7,en-US;q=0.6",
+    "Cache-Control": "max-age=0",
+    "Connection": "keep-alive",
+    "Host": "cn.bing.com",
+    "Referer": "https://cn.bing.com/",
+    "Sec-Ch-Ua": "\"Chromium\";v=\"122\", \"Microsoft Edge\";v=\"122\", \"Not-A.Brand\";v=\"99\"",
+    "Sec-Ch-Ua-Mobile": "?0",
+    "Sec-Ch-Ua-Platform": "\"Windows\"",
+    "Sec-Fetch-Dest": "document",
+    "Sec-Fetch-Mode": "navigate",
+    "Sec-Fetch-Site": "same-origin",
+    "Sec-Fetch-User": "?1",
+    "Upgrade-Insecure-Requests": "1",
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36 Edg/122.0.0.0"
+}
+
+# 设置必要的Cookie
+COOKIES = {
+    "SRCHHPGUSR": "SRCHLANG=zh-Hans",  # 设置默认搜索语言为中文
+    "SRCHD": "AF=NOFORM",
+    "SRCHUID": "V=2&GUID=1A4D4F1C8844493F9A2E3DB0D1BC806C",
+    "_SS": "SID=0D89D9A3C95C60B62E7AC80CC85461B3",
+    "_EDGE_S": "ui=zh-cn",  # 设置界面语言为中文
+    "_EDGE_V": "1"
+}
+
+bing_host_url = "https://www.bing.com"
+bing_search_url = "https://www.bing.com/search?q="
+cn_bing_host_url = "https://cn.bing.com"
+cn_bing_search_url = "https://cn.bing.com/search?q="
+
+# 对冲请求：先请求国际版，超过该时间仍无结果时并发请求中国版（秒），0为同时发起
+HEDGE_DELAY = 0.8
+
+# 分页并发抓取：必应每页结果数、同时抓取的最大页数（1为逐页跟随下一页链接）
+PAGE_SIZE = 10
+PAGE_FANOUT = 3
+
+# 是否先请求 RSS（format=rss），RSS 为空时再抓取 HTML 结果页
+RSS_FIRST = True
+
+class PageContext:
+    """一次页面解析的上下文，BeautifulSoup 树在第一个需要它的策略中才构建，之后的策略复用"""
+
+    def __init__(self, text: str, rank_start: int = 0, host_url: str = bing_host_url, max_results: Optional[int] = None):
+        self.text = text
+        self.rank_start = rank_start
+        self.host_url = host_url
+        self.max_results = max_results
+        self._soup = None
+
+    @property
+    def soup(self) -> BeautifulSoup:
+        if self._soup is None:
+            try:
+                # 首先尝试使用lxml解析器
+                self._soup = BeautifulSoup(self.text, "lxml")
+            except Exception as e:
+                logger.warning(f"lxml解析器不可用: {str(e)}，使用html.parser")
+                self._soup = BeautifulSoup(self.text, "html.parser")
+            # 保存解析结果的一小部分用于调试（序列化整棵树开销较大，只在调试日志开启时执行）
+            if is_debug_enabled(logger):
+                logger.debug(f"HTML解析结果示例: {str(self._soup)[:1000]}")
+        return self._soup
+
+
+# 提取策略：接收页面上下文，返回 (结果列表, 下一页url)，没有提取到结果时结果列表为空
+ExtractionStrategy = Callable[[PageContext], Tuple[List[Dict[str, Any]], Optional[str]]]
+
+
+def _extract_b_algo(page: PageContext) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """标准结果项：直接用预编译选择器提取 li.b_algo"""
+    return parse_bing_html(page.text, page.rank_start, page.host_url, page.max_results)
+
+
+def _extract_containers(page: PageContext) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """在可能的结果容器中查找带链接的标题，并在相邻元素中查找摘要"""
+    root = page.soup
+    # 尝试查找包含完整结果项的父容器
+    result_containers = []
+    # 一些可能的结果容器选择器
+    container_selectors = [
+        "ol#b_results", "div.b_searchResults", "div#b_content",
+        "div.srchrslt_main", "div.mspg_cont", "div.ms-srchResult-results",
+        "div#ContentAll", "div.resultlist"
+    ]
+
+    for selector in container_selectors:
+        containers = root.select(selector)
+        if containers:
+            logger.debug(f"找到可能的结果容器: {selector}, 数量: {len(containers)}")
+            result_containers.extend(containers)
+
+    # 如果找到容器，尝试在容器中寻找有价值的链接
+    extracted_items = []
+    for container in result_containers:
+        # 查找标题元素（h1, h2, h3, h4）
+        for heading in container.find_all(["h1", "h2", "h3", "h4", "strong", "b"]):
+            # 如果标题元素包含链接，这很可能是搜索结果的标题
+            link = heading.find("a")
+            if link and link.get("href") and link.text.strip():
+                url = clean_result_url(link.get("href"))
+                title = link.text.strip()
+
+                # 如果是有效的外部链接
+                if (not url.startswith("javascript:") and
+                    not url.startswith("#") and
+                    not any(x in url for x in ["bing.com/search", "bing.com/images"])):
+
+                    # 查找摘要：尝试找到相邻的段落元素
+                    abstract = ""
+                    # 尝试在标题后面查找摘要
+                    next_elem = heading.next_sibling
+                    while next_elem and not abstract:
+                        if hasattr(next_elem, 'name') and next_elem.name in ['p', 'div', 'span']:
+                            abstract = next_elem.text.strip()
+                            break
+                        next_elem = next_elem.next_sibling
+
+                    # 如果没找到，尝试在父元素内查找其他段落
+                    if not abstract:
+                        parent = heading.parent
+                        for p in parent.find_all(['p', 'div'], class_=lambda c: c and any(x in str(c) for x in ["desc", "abstract", "snippet", "caption", "summary"])):
+                            if p != heading:
+                                abstract = p.text.strip()
+                                break
+
+                    # 创建结果项
+                    extracted_items.append({
+                        "title": title,
+                        "url": url,
+                        "abstract": abstract,
+                    })
+                    logger.debug(f"提取到搜索结果: {title}")
+
+    list_data = []
+    seen_urls = set()
+    for item in extracted_items:
+        if item["url"] in seen_urls:
+            continue
+        seen_urls.add(item["url"])
+        # 裁剪摘要长度
+        abstract = item["abstract"]
+        if ABSTRACT_MAX_LENGTH and len(abstract) > ABSTRACT_MAX_LENGTH:
+            abstract = abstract[:ABSTRACT_MAX_LENGTH]
+
+        list_data.append({
+            "title": item["title"],
+            "abstract": abstract,
+            "url": item["url"],
+            "rank": page.rank_start + len(list_data) + 1
+        })
+    if list_data:
+        logger.debug(f"从容器中提取了 {len(list_data)} 个搜索结果")
+    return list_data, None
+
+
+def _extract_links(page: PageContext) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """通用链接提取：按标题长度挑选最像搜索结果的外部链接"""
+    all_links = page.soup.find_all("a")
+
+    # 记录链接总数，帮助诊断
+    logger.debug(f"页面中总共找到了 {len(all_links)} 个链接")
+
+    # 保存一些链接示例到日志
+    if is_debug_enabled(logger):
+        sample_links = []
+        for link in all_links[:10]:  # 只记录前10个链接
+            sample_links.append({
+                "text": link.text.strip(),
+                "href": link.get("href", "")
+            })
+        logger.debug(f"链接示例: {sample_links}")
+
+    valid_links = []
+    for link in all_links:
+        href = clean_result_url(link.get("href", ""))
+        text = link.text.strip()
+
+        # 有效的搜索结果链接通常有这些特点
+        if (href and text and
+            len(text) > 10 and  # 标题通常比较长
+            not href.startswith("javascript:") and
+            not href.startswith("#") and
+            not any(x in href for x in [
+                "bing.com/search", "bing.com/images", "bing.com/videos",
+                "bing.com/maps", "bing.com/news", "login", "account",
+                "javascript", "about.html", "help.html", "microsoft"
+            ]) and
+            "http" in href):  # 必须是有效URL
+            valid_links.append((link, href))
+
+    # 按文本长度排序，更长的文本更可能是搜索结果标题
+    valid_links.sort(key=lambda x: len(x[0].text.strip()), reverse=True)
+
+    list_data = []
+    if valid_links:
+        logger.debug(f"找到 {len(valid_links)} 个可能的搜索结果链接")
+
+    # 提取前10个作为搜索结果
+    seen_urls = set()
+    for link, href in valid_links:
+        if len(list_data) >= 10:
+            break
+        if href in seen_urls:
+            continue
+        seen_urls.add(href)
+        rank = page.rank_start + len(list_data) + 1
+        text = link.text.strip()
+
+        # 获取摘要
+        abstract = ""
+        # 尝试获取父元素的文本作为摘要
+        parent = link.parent
+        if parent and parent.text:
+            full_text = parent.text.strip()
+            if len(full_text) > len(text):
+                abstract = full_text.replace(text, "", 1).strip()
+
+        # 如果没有找到好的摘要，尝试查找相邻元素
+        if len(abstract) < 20:
+            next_elem = link.next_sibling
+            while next_elem and len(abstract) < 20:
+                if hasattr(next_elem, 'text') and next_elem.text.strip():
+                    abstract = next_elem.text.strip()
+                    break
+                next_elem = next_elem.next_sibling
+
+        # 裁剪摘要长度
+        if ABSTRACT_MAX_LENGTH and len(abstract) > ABSTRACT_MAX_LENGTH:
+            abstract = abstract[:ABSTRACT_MAX_LENGTH]
+
+        list_data.append({
+            "title": text,
+            "abstract": abstract,
+            "url": href,
+            "rank": rank
+        })
+        logger.debug(f"提取到备选搜索结果 #{rank}: {text}")
+
+    if list_data:
+        logger.debug(f"通过备选方法提取了 {len(list_data)} 个搜索结果")
+    return list_data, None
+
+
+def _find_next_url(page: PageContext) -> Optional[str]:
+    """所有策略都没有结果时，尝试多种方式找到下一页按钮"""
+    root = page.soup
+
+    # 检查是否有错误消息
+    error_msg = root.find("div", class_="b_searcherrmsg")
+    if error_msg:
+        logger.error(f"必应搜索返回错误: {error_msg.text.strip()}")
+
+    next_url = None
+
+    # 方式1: 标准下一页按钮
+    pagination_classes = ["b_widePag sb_bp", "b_pag"]
+    for cls in pagination_classes:
+        next_page = root.find("a", class_=cls)
+        if next_page and any(txt in next_page.text for txt in ["下一页", "Next", "下页"]):
+            next_url = next_page.get("href", "")
+            break
+
+    # 方式2: 备用下一页按钮
+    if not next_url:
+        pagination = root.find_all("a", class_="sb_pagN")
+        if pagination:
+            next_url = pagination[0].get("href", "")
+
+    # 方式3: 通用导航元素
+    if not next_url:
+        for link in root.find_all("a"):
+            if link.text.strip() in ["下一页", "Next", "下页", "»", ">>"]:
+                next_url = link.get("href", "")
+                break
+
+    if next_url and not next_url.startswith("http"):
+        next_url = page.host_url + next_url
+    return next_url or None
+
+
+class StrategySelector:
+    """按注册顺序保存提取策略，记录各策略命中次数，并把上一次成功的策略排到最前面"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._strategies: Dict[str, ExtractionStrategy] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._last_winner: Optional[str] = None
+
+    def register(self, name: str, strategy: ExtractionStrategy) -> None:
+        """注册提取策略，同名策略会被替换，新策略排在已有策略之后"""
+        with self._lock:
+            self._strategies[name] = strategy
+            self._stats.setdefault(name, {"attempts": 0, "hits": 0})
+
+    def ordered(self) -> List[Tuple[str, ExtractionStrategy]]:
+        """返回本次应尝试的策略顺序"""
+        with self._lock:
+            items = list(self._strategies.items())
+            winner = self._last_winner
+        if winner is not None:
+            items.sort(key=lambda item: item[0] != winner)
+        return items
+
+    def record(self, name: str, hit: bool) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(name, {"attempts": 0, "hits": 0})
+            stats["attempts"] += 1
+            if hit:
+                stats["hits"] += 1
+                self._last_winner = name
+
+    @property
+    def last_winner(self) -> Optional[str]:
+        return self._last_winner
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "last_winner": self._last_winner,
+                "strategies": {
+                    name: {
+                        **stats,
+                        "hit_rate": round(stats["hits"] / stats["attempts"], 4) if stats["attempts"] else 0.0,
+                    }
+                    for name, stats in self._stats.items()
+                },
+            }
+
+
+STRATEGY_B_ALGO = "b_algo"
+STRATEGY_CONTAINERS = "containers"
+STRATEGY_LINKS = "links"
+
+# 进程内共享的策略选择器，成功经验在所有搜索之间共享
+_selector = StrategySelector()
+_selector.register(STRATEGY_B_ALGO, _extract_b_algo)
+_selector.register(STRATEGY_CONTAINERS, _extract_containers)
+_selector.register(STRATEGY_LINKS, _extract_links)
+
+
+def register_strategy(name: str, strategy: ExtractionStrategy) -> None:
+    """注册自定义提取策略，排在内置策略之后，成功一次后会被优先尝试"""
+    _selector.register(name, strategy)
+
+
+# RSS 快速路径的统计，与 HTML 提取策略分开记录，不参与策略排序
+_rss_stats = {"attempts": 0, "hits": 0}
+_rss_stats_lock = threading.Lock()
+
+
+def _record_rss(hit: bool) -> None:
+    with _rss_stats_lock:
+        _rss_stats["attempts"] += 1
+        if hit:
+            _rss_stats["hits"] += 1
+
+
+def strategy_stats() -> Dict[str, Any]:
+    """返回各提取策略的尝试次数、命中次数与命中率，以及上一次成功的策略和 RSS 快速路径的命中情况"""
+    stats = _selector.stats()
+    with _rss_stats_lock:
+        attempts, hits = _rss_stats["attempts"], _rss_stats["hits"]
+    stats["rss"] = {"attempts": attempts, "hits": hits, "hit_rate": round(hits / attempts, 4) if attempts else 0.0}
+    return stats
+
+
+def extract_results(page: PageContext, skip: Tuple[str, ...] = ()) -> Tuple[List[Dict[str, Any]], Optional[str], Optional[str]]:
+    """
+    按自适应顺序依次尝试提取策略，返回第一个提取到结果的策略的结果。
+    :param skip: 本次不再尝试的策略（如下载时已流式尝试过的 b_algo）
+    :return: (结果列表, 下一页url, 命中的策略名)；所有策略都失败时结果为空，下一页url取自分页按钮
+    """
+    for name, strategy in _selector.ordered():
+        if name in skip:
+            continue
+        try:
+            results, next_url = strategy(page)
+        except Exception as e:
+            logger.warning(f"提取策略 {name} 出错: {str(e)}")
+            results, next_url = [], None
+        _selector.record(name, bool(results))
+        if results:
+            return results, next_url, name
+    return [], _find_next_url(page), None
+
+
+class BingEngine:
+    """必应搜索引擎，基于共享的 aiohttp 会话"""
+
+    def __init__(self, host_url=bing_host_url):
+        """
+        :param host_url: 必应站点地址，如 https://www.bing.com 或 https://cn.bing.com
+        """
+        self.host_url = host_url
+        self.search_url = host_url + "/search?q="
+
+    async def search(self, keyword, num_results=10, page_fanout=PAGE_FANOUT, rss_first=RSS_FIRST):
+        """
+        通过关键字进行搜索
+        :param keyword: 关键字
+        :param num_results： 指定返回的结果个数
+        :param page_fanout: 同时抓取的最大页数，大于1且需要多页时按 first= 偏移并发抓取
+        :param rss_first: 是否先请求 RSS，RSS 为空时再抓取 HTML
+        :return: 结果列表
+        """
+        if not keyword:
+            return None
+
+        if rss_first:
+            list_result = await self._search_pages(keyword, num_results, max(1, page_fanout), self.fetch_rss_page)
+            if list_result:
+                return list_result
+            logger.debug(f"---searching[{keyword}], RSS 没有结果，改为抓取 HTML")
+
+        if page_fanout > 1 and num_results > PAGE_SIZE:
+            return await self._search_pages(keyword, num_results, page_fanout, self.fetch_page)
+
+        list_result = []
+        page = 1
+
+        # 起始搜索的url
+        next_url = self.search_url + quote(keyword)
+
+        # 循环遍历每一页的搜索结果，并返回下一页的url
+        while len(list_result) < num_results:
+            data, next_url = await self.fetch_page(
+                next_url, rank_start=len(list_result), max_results=num_results - len(list_result)
+            )
+            if data:
+                list_result += data
+                logger.debug("---searching[{}], finish parsing page {}, results number={}: ".format(keyword, page, len(data)))
+                if is_debug_enabled(logger):
+                    for d in data:
+                        logger.debug(str(d))
+
+            if not next_url:
+                logger.debug(u"already search the last page。")
+                break
+            page += 1
+
+        logger.debug("\n---search [{}] finished. total results number={}！".format(keyword, len(list_result)))
+        return list_result[: num_results] if len(list_result) > num_results else list_result
+
+    async def _search_pages(self, keyword, num_results, page_fanout, fetch):
+        """
+        预先按 first= 计算各页偏移并发抓取，按页序合并并按url去重，凑够结果数后取消剩余页
+        :param fetch: 单页抓取方法，fetch_page（HTML）或 fetch_rss_page（RSS）
+        :return: 结果列表
+        """
+        pages = math.ceil(num_results / PAGE_SIZE)
+        semaphore = asyncio.Semaphore(page_fanout)
+
+        async def fetch_page(index):
+            async with semaphore:
+                url = f"{self.search_url}{quote(keyword)}&first={index * PAGE_SIZE + 1}"
+                # 只有一页时凑够结果即可提前结束；多页合并时会去重，每页都读完整，避免重复结果导致总数不足
+                data, _ = await fetch(
+                    url, rank_start=index * PAGE_SIZE, max_results=num_results if pages == 1 else None
+                )
+                return data or []
+
+        tasks = [asyncio.ensure_future(fetch_page(index)) for index in range(pages)]
+        list_result = []
+        seen_urls = set()
+        try:
+            # 按页序等待，保证合并后的排名与逐页抓取一致
+            for index, task in enumerate(tasks):
+                data = await task
+                if not data:
+                    # 该页没有结果，后面的页也不会有
+                    logger.debug(f"---searching[{keyword}], page {index + 1} is empty, stop")
+                    break
+                for item in data:
+                    if item["url"] in seen_urls:
+                        continue
+                    seen_urls.add(item["url"])
+                    item["rank"] = len(list_result) + 1
+                    list_result.append(item)
+                logger.debug("---searching[{}], finish parsing page {}, results number={}: ".format(keyword, index + 1, len(data)))
+                if len(list_result) >= num_results:
+                    break
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        logger.debug("\n---search [{}] finished. total results number={}！".format(keyword, len(list_result)))
+        return list_result[:num_results]
+
+    async def fetch_page(self, url, rank_start=0, max_results=None):
+        """
+        抓取并解析处理结果
+        :param url: 需要抓取的 url
+        :param max_results: 本页需要的结果数，凑够后停止读取响应；None 表示读完整页
+        :return:  结果列表，下一页的url
+        """
+        try:
+            logger.debug("--search_bing-------url: {}".format(url))
+
+            # 确定是国际版还是中国版必应
+            is_cn_bing = "cn.bing.com" in url
+
+            # 站点熔断中时直接返回，不再发请求
+            breaker = get_breaker(host_of(url))
+            if not breaker.allow():
+                logger.warning(f"必应站点 {breaker.name} 熔断中，约 {breaker.retry_after():.0f} 秒后重试")
+                return [], None
+
+            # 诊断转储的文件名
+            query_part = url.split("?q=")[1] if "?q=" in url else "unknown_query"
+            dump_name = f"bing_{'cn' if is_cn_bing else 'www'}_search_{query_part[:30]}"
+            diagnostics = get_diagnostics()
+
+            # 使用适当的请求头
+            # 为每次请求随机选择不同的用户代理，降低被屏蔽风险
+            headers = CN_BING_HEADERS.copy() if is_cn_bing else HEADERS.copy()
+            headers["User-Agent"] = random.choice(user_agents)
+
+            # 上一次命中的是 li.b_algo（或还没有记录）时，边下载边解析，凑够结果后提前结束
+            make_parser = None
+            if _selector.last_winner in (None, STRATEGY_B_ALGO):
+                make_parser = lambda: StreamingBingParser(rank_start, max_results, self.host_url)
+
+            # 在共享会话上抓取，复用长连接
+            page = await fetch_url(
+                url, headers, COOKIES, make_parser, insecure_retry=True, chunk_size=STREAM_CHUNK_SIZE
+            )
+            if page is None:
+                # 如果所有尝试都失败，返回空结果
+                breaker.record_failure()
+                return [], None
+            status_code, final_url, text, stream_parser = page
+
+            if not _check_response(status_code, final_url, text, breaker, dump_name):
+                return [], None
+
+            skip = ()
+            if stream_parser is not None:
+                # 下载时已流式尝试过 li.b_algo
+                list_data, next_url = stream_parser.close()
+                _selector.record(STRATEGY_B_ALGO, bool(list_data))
+                if list_data:
+                    logger.debug(f"快速解析得到 {len(list_data)} 个结果，下一页链接: {next_url}")
+                    diagnostics.dump(dump_name, text)
+                    return list_data, next_url
+                skip = (STRATEGY_B_ALGO,)
+
+            list_data, next_url, strategy = extract_results(
+                PageContext(text, rank_start, self.host_url, max_results), skip=skip
+            )
+            if strategy is None or strategy != STRATEGY_B_ALGO:
+                # 标准结构没有命中时按失败保存页面，便于排查页面结构变化
+                diagnostics.dump(dump_name, text, error=True)
+            else:
+                diagnostics.dump(dump_name, text)
+            logger.debug(f"策略 {strategy} 解析得到 {len(list_data)} 个结果，下一页链接: {next_url}")
+            return list_data, next_url
+
+        except Exception as e:
+            logger.error(f"解析页面时出错: {str(e)}")
+            if is_debug_enabled(logger):
+                logger.debug(traceback.format_exc())
+            return None, None
+
+
+    async def fetch_rss_page(self, url, rank_start=0, max_results=None):
+        """
+        抓取并解析 RSS 格式的结果页
+        :param url: HTML 结果页的 url，会追加 format=rss
+        :param max_results: 本页需要的结果数，凑够后停止读取响应；None 表示读完整页
+        :return: 结果列表，下一页的url（RSS 没有下一页链接，始终为 None）
+        """
+        try:
+            rss_url = url + "&format=rss"
+            logger.debug("--search_bing-------rss url: {}".format(rss_url))
+            breaker = get_breaker(host_of(rss_url))
+            if not breaker.allow():
+                return [], None
+
+            query_part = url.split("?q=")[1] if "?q=" in url else "unknown_query"
+            dump_name = f"bing_{'cn' if 'cn.bing.com' in url else 'www'}_rss_{query_part[:30]}"
+            headers = CN_BING_HEADERS.copy() if "cn.bing.com" in url else HEADERS.copy()
+            headers["User-Agent"] = random.choice(user_agents)
+            headers["Accept"] = "application/rss+xml,application/xml;q=0.9,*/*;q=0.8"
+
+            page = await fetch_url(
+                rss_url,
+                headers,
+                COOKIES,
+                lambda: StreamingBingRssParser(rank_start, max_results),
+                insecure_retry=True,
+                chunk_size=STREAM_CHUNK_SIZE,
+            )
+            if page is None:
+                breaker.record_failure()
+                return [], None
+            status_code, final_url, text, rss_parser = page
+            if not _check_response(status_code, final_url, text, breaker, dump_name):
+                return [], None
+
+            list_data = rss_parser.close()
+            _record_rss(bool(list_data))
+            logger.debug(f"RSS 解析得到 {len(list_data)} 个结果")
+            return list_data, None
+        except Exception as e:
+            logger.error(f"解析RSS时出错: {str(e)}")
+            return [], None
+
+
+def _check_response(status_code, final_url, text, breaker, dump_name) -> bool:
+    """
+    检查响应是否被拒绝（403、非200、跳转到登录或验证页），并据此更新站点熔断器。
+    :return: 响应可用时为 True
+    """
+    logger.debug(f"--search_bing-------status_code: {status_code}")
+    if status_code == 403:
+        logger.error(f"被禁止访问 (403 Forbidden)，可能是IP被限制")
+    elif status_code != 200:
+        logger.error(f"必应搜索请求失败，状态码: {status_code}")
+    elif "login.live.com" in final_url or "login.microsoftonline.com" in final_url:
+        logger.error("被重定向到登录页面，可能需要登录")
+    elif "https://www.bing.com/ck/a" in final_url:
+        logger.error("被重定向到验证页面，可能被识别为机器人")
+    else:
+        breaker.record_success()
+        return True
+    breaker.record_failure()
+    get_diagnostics().dump(dump_name, text, error=True)
+    return False
+
+
+async def hedged_search(
+    keyword, num_results=10, hedge_delay=HEDGE_DELAY, hosts=(bing_host_url, cn_bing_host_url)
+) -> List[Dict[str, Any]]:
+    """
+    对冲搜索：先请求第一个端点，hedge_delay 秒内没有结果时并发请求下一个端点，
+    采用最先返回的非空结果并取消其余请求。
+    :param keyword: 关键字
+    :param num_results: 指定返回的结果个数
+    :param hedge_delay: 后续端点延迟启动的秒数，0为同时发起
+    :param hosts: 依次尝试的必应站点地址，默认国际版在前、中国版在后
+    :return: 结果列表，所有端点都没有结果时为空列表
+    """
+
+    async def run(host_url):
+        try:
+            return await BingEngine(host_url).search(keyword, num_results)
+        except Exception as e:
+            logger.error(f"必应搜索 ({host_url}) 失败: {str(e)}")
+            return None
+
+    # 跳过熔断中的站点，全部熔断时立即返回
+    hosts = [host_url for host_url in hosts if not get_breaker(host_of(host_url)).is_open()]
+    if not hosts:
+        logger.warning("所有必应站点均在熔断中，跳过本次搜索")
+        return []
+
+    pending = {asyncio.create_task(run(hosts[0]))}
+    hosts_left = list(hosts[1:])
+    try:
+        while pending:
+            # 还有备用端点未启动时，只等待 hedge_delay；否则一直等到有请求完成
+            timeout = hedge_delay if hosts_left else None
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                result = task.result()
+                if result:
+                    return result
+            if hosts_left and (not done or not pending):
+                # 首个端点超时未返回或已失败，启动备用端点
+                host_url = hosts_left.pop(0)
+                logger.info(f"对冲请求备用端点: {host_url}")
+                pending.add(asyncio.create_task(run(host_url)))
+        return []
+    finally:
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,401 @@
+"""
+必应结果页解析
+
+直接定位 li.b_algo 结果项的快速解析器：
+- 使用 lxml 与预编译的 XPath，不构建 BeautifulSoup 树
+- lxml 不可用或解析失败时退回 BeautifulSoup 的 li.b_algo 选择
+- 返回结果列表与下一页链接，供 bing_search 与 bing_search_tool 共用
+- 流式模式：边下载边增量解析，凑够所需结果数后即可停止读取响应
+- RSS 模式：解析 format=rss 返回的精简 XML，每个 item 只有标题、链接与描述
+- 结果链接是 bing.com/ck/a 跟踪跳转时，直接从 u= 参数本地解码出真实地址，规范化后去重
+"""
+
+import base64
+import binascii
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from xml.etree import ElementTree
+
+from bs4 import BeautifulSoup
+
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+ABSTRACT_MAX_LENGTH = 300
+STREAM_CHUNK_SIZE = 16 * 1024  # 流式读取响应的块大小
+
+if LXML_AVAILABLE:
+    # 按 class 单词匹配，等价于 CSS 选择器 li.b_algo / a.sb_pagN
+    _RESULT_ITEMS = etree.XPath('//li[contains(concat(" ", normalize-space(@class), " "), " b_algo ")]')
+    _TITLE_LINK = etree.XPath("(.//h2//a[@href])[1]")
+    _ABSTRACT = etree.XPath("(.//p)[1]")
+    _NEXT_PAGE = etree.XPath('(//a[contains(concat(" ", normalize-space(@class), " "), " sb_pagN ")]/@href)[1]')
+
+
+_REDIRECT_PATH = "/ck/a"
+_DEFAULT_PORTS = {"http": "80", "https": "443"}
+_TRACKING_PARAMS = ("utm_",)  # 规范化时去掉的跟踪参数前缀
+
+
+def decode_bing_redirect(url: str) -> str:
+    """
+    从必应的 /ck/a 跟踪跳转链接中解码出真实地址，不发任何请求。
+    u= 参数形如 a1<base64url>，去掉 a1 前缀后按无填充的 base64url 解码。
+    :param url: 结果链接，可以是完整地址或站内相对地址
+    :return: 真实地址；不是跳转链接或无法解码时原样返回
+    """
+    if not url or _REDIRECT_PATH not in url:
+        return url
+    parts = urlsplit(url)
+    if parts.path != _REDIRECT_PATH or (parts.netloc and not parts.netloc.endswith("bing.com")):
+        return url
+    encoded = dict(parse_qsl(parts.query)).get("u", "")
+    if not encoded.startswith("a1"):
+        return url
+    encoded = encoded[2:]
+    try:
+        target = base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4)).decode("utf-8")
+    except (binascii.Error, ValueError):
+        return url
+    return target if target.startswith(("http://", "https://")) else url
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    规范化结果链接，用于展示与去重：协议与域名转小写、去掉默认端口、片段和 utm_ 跟踪参数。
+    :return: 规范化后的地址；不是 http(s) 地址时原样返回
+    """
+    if not url:
+        return url
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    if scheme not in _DEFAULT_PORTS or not parts.netloc:
+        return url
+    netloc = parts.netloc.lower()
+    if netloc.endswith(":" + _DEFAULT_PORTS[scheme]):
+        netloc = netloc.rsplit(":", 1)[0]
+    query = parts.query
+    if query and any(prefix in query for prefix in _TRACKING_PARAMS):
+        params = parse_qsl(query, keep_blank_values=True)
+        query = urlencode([(k, v) for k, v in params if not k.startswith(_TRACKING_PARAMS)])
+    return urlunsplit((scheme, netloc, parts.path or "/", query, ""))
+
+
+def clean_result_url(url: str) -> str:
+    """解码 /ck/a 跳转并规范化，得到结果的最终地址"""
+    return canonicalize_url(decode_bing_redirect(url))
+
+
+def _make_result(title: str, url: str, abstract: str, rank: int) -> Dict:
+    if ABSTRACT_MAX_LENGTH and len(abstract) > ABSTRACT_MAX_LENGTH:
+        abstract = abstract[:ABSTRACT_MAX_LENGTH]
+    return {"title": title, "abstract": abstract, "url": url, "rank": rank}
+
+
+def _add_result(results: List[Dict], seen: Set[str], title: str, href: str, abstract: str, rank_start: int) -> bool:
+    """
+    解码并规范化链接后追加结果，链接与已有结果重复时跳过。
+    :return: 是否追加了结果
+    """
+    url = clean_result_url(href)
+    if url in seen:
+        return False
+    seen.add(url)
+    results.append(_make_result(title, url, abstract, rank_start + len(results) + 1))
+    return True
+
+
+def _absolute_url(href: Optional[str], host_url: str) -> Optional[str]:
+    if href and not href.startswith("http"):
+        return host_url + href
+    return href or None
+
+
+def _parse_with_lxml(text: str, rank_start: int, max_results: Optional[int]) -> Tuple[List[Dict], Optional[str]]:
+    root = lxml_html.document_fromstring(text)
+    results = []
+    seen = set()
+    for item in _RESULT_ITEMS(root):
+        links = _TITLE_LINK(item)
+        if not links:
+            continue
+        link = links[0]
+        title = link.text_content().strip()
+        if not title:
+            continue
+        abstracts = _ABSTRACT(item)
+        abstract = abstracts[0].text_content().strip() if abstracts else ""
+        _add_result(results, seen, title, link.get("href"), abstract, rank_start)
+        if max_results is not None and len(results) >= max_results:
+            break
+    next_page = _NEXT_PAGE(root)
+    return results, next_page[0] if next_page else None
+
+
+def _parse_with_bs4(text: str, rank_start: int, max_results: Optional[int]) -> Tuple[List[Dict], Optional[str]]:
+    soup = BeautifulSoup(text, "lxml" if LXML_AVAILABLE else "html.parser")
+    results = []
+    seen = set()
+    for item in soup.select("li.b_algo"):
+        title_tag = item.find("h2")
+        link = title_tag.find("a", href=True) if title_tag else None
+        title = link.text.strip() if link else ""
+        if not title:
+            continue
+        abstract_tag = item.find("p")
+        abstract = abstract_tag.text.strip() if abstract_tag else ""
+        _add_result(results, seen, title, link["href"], abstract, rank_start)
+        if max_results is not None and len(results) >= max_results:
+            break
+    next_page = soup.select_one("a.sb_pagN")
+    return results, next_page.get("href") if next_page else None
+
+
+def parse_bing_html(
+    text: str,
+    rank_start: int = 0,
+    host_url: str = "",
+    max_results: Optional[int] = None,
+    use_lxml: bool = True,
+) -> Tuple[List[Dict], Optional[str]]:
+    """
+    解析必应结果页中的 li.b_algo 结果项。
+    :param text: 页面 HTML
+    :param rank_start: 排名起始值，第一条结果的 rank 为 rank_start + 1
+    :param host_url: 必应站点地址，用于补全相对的下一页链接
+    :param max_results: 最多返回的结果数，None 表示不限
+    :param use_lxml: 是否使用 lxml 快速路径，False 时直接使用 BeautifulSoup
+    :return: (结果列表, 下一页url)，页面中没有 li.b_algo 时结果列表为空
+    """
+    if not text:
+        return [], None
+    if use_lxml and LXML_AVAILABLE:
+        try:
+            results, next_href = _parse_with_lxml(text, rank_start, max_results)
+        except (etree.ParserError, ValueError) as e:
+            print(f"lxml解析必应页面失败，改用BeautifulSoup: {e}")
+            results, next_href = _parse_with_bs4(text, rank_start, max_results)
+    else:
+        results, next_href = _parse_with_bs4(text, rank_start, max_results)
+    return results, _absolute_url(next_href, host_url)
+
+
+def _has_class(attrib, name: str) -> bool:
+    return name in (attrib.get("class") or "").split()
+
+
+class _ResultTarget:
+    """lxml 解析器的事件回调，按标签事件直接提取 li.b_algo 结果项，不构建解析树"""
+
+    def __init__(self, rank_start: int, max_results: Optional[int]):
+        self.rank_start = rank_start
+        self.max_results = max_results
+        self.results: List[Dict] = []
+        self.next_href: Optional[str] = None
+        self._seen: Set[str] = set()
+        self._item_depth = 0  # 当前结果项内嵌套的 li 层数，0 表示不在结果项中
+        self._h2_depth = 0
+        self._title_depth = 0  # 正在读取标题链接时的 a 嵌套层数
+        self._abstract_depth = 0  # 正在读取摘要时的 p 嵌套层数
+        self._reset_item()
+
+    @property
+    def done(self) -> bool:
+        return self.max_results is not None and len(self.results) >= self.max_results
+
+    def _reset_item(self) -> None:
+        self._url = None
+        self._title: List[str] = []
+        self._abstract: List[str] = []
+        self._abstract_seen = False
+
+    def start(self, tag, attrib) -> None:
+        if self.done:
+            return
+        if tag == "a" and self.next_href is None and _has_class(attrib, "sb_pagN"):
+            self.next_href = attrib.get("href")
+        if self._item_depth == 0:
+            if tag == "li" and _has_class(attrib, "b_algo"):
+                self._item_depth = 1
+                self._reset_item()
+            return
+        if tag == "li":
+            self._item_depth += 1
+        elif tag == "h2":
+            self._h2_depth += 1
+        elif tag == "a":
+            if self._title_depth:
+                self._title_depth += 1
+            elif self._h2_depth and self._url is None and attrib.get("href"):
+                self._url = attrib.get("href")
+                self._title_depth = 1
+        elif tag == "p":
+            if self._abstract_depth:
+                self._abstract_depth += 1
+            elif not self._abstract_seen:
+                self._abstract_seen = True
+                self._abstract_depth = 1
+
+    def end(self, tag) -> None:
+        if self._item_depth == 0 or self.done:
+            return
+        if tag == "a" and self._title_depth:
+            self._title_depth -= 1
+        elif tag == "p" and self._abstract_depth:
+            self._abstract_depth -= 1
+        elif tag == "h2" and self._h2_depth:
+            self._h2_depth -= 1
+        elif tag == "li":
+            self._item_depth -= 1
+            if self._item_depth == 0:
+                self._finish_item()
+
+    def data(self, data) -> None:
+        if self._title_depth:
+            self._title.append(data)
+        if self._abstract_depth:
+            self._abstract.append(data)
+
+    def close(self) -> None:
+        return None
+
+    def _finish_item(self) -> None:
+        self._h2_depth = self._title_depth = self._abstract_depth = 0
+        title = "".join(self._title).strip()
+        if self._url and title:
+            abstract = "".join(self._abstract).strip()
+            _add_result(self.results, self._seen, title, self._url, abstract, self.rank_start)
+
+
+class StreamingBingParser:
+    """
+    增量解析必应结果页：逐块喂入响应内容，凑够 max_results 个结果后 done 为 True，调用方即可停止读取并关闭连接。
+    lxml 不可用或增量解析出错时只缓存内容，close 时按完整页面解析。
+    """
+
+    def __init__(self, rank_start: int = 0, max_results: Optional[int] = None, host_url: str = ""):
+        self.rank_start = rank_start
+        self.max_results = max_results
+        self.host_url = host_url
+        self._chunks: List[bytes] = []
+        self._target: Optional[_ResultTarget] = None
+        self._parser = None
+        if LXML_AVAILABLE:
+            self._target = _ResultTarget(rank_start, max_results)
+            self._parser = etree.HTMLParser(target=self._target, encoding="utf-8")
+
+    @property
+    def done(self) -> bool:
+        """是否已凑够所需结果数"""
+        return self._target is not None and self._target.done
+
+    @property
+    def text(self) -> str:
+        """目前已读取的页面内容（提前结束时不是完整页面）"""
+        return b"".join(self._chunks).decode("utf-8", errors="replace")
+
+    def feed(self, chunk: bytes) -> bool:
+        """
+        喂入一块响应内容。
+        :return: 是否已凑够所需结果数
+        """
+        self._chunks.append(chunk)
+        if self._parser is not None and not self.done:
+            try:
+                self._parser.feed(chunk)
+            except (etree.ParserError, ValueError) as e:
+                print(f"增量解析必应页面失败，改为完整解析: {e}")
+                self._parser = None
+                self._target = None
+        return self.done
+
+    def close(self) -> Tuple[List[Dict], Optional[str]]:
+        """
+        结束解析。
+        :return: (结果列表, 下一页url)
+        """
+        if self._parser is None:
+            return parse_bing_html(self.text, self.rank_start, self.host_url, self.max_results)
+        try:
+            self._parser.close()
+        except (etree.ParserError, ValueError):
+            pass
+        return self._target.results, _absolute_url(self._target.next_href, self.host_url)
+
+
+class StreamingBingRssParser:
+    """
+    增量解析必应 RSS（format=rss）：每读到一个完整的 item 就提取结果并释放该节点，
+    凑够 max_results 个结果后 done 为 True。内容不是合法 XML（如被重定向到 HTML 验证页）时结果为空。
+    """
+
+    def __init__(self, rank_start: int = 0, max_results: Optional[int] = None):
+        self.rank_start = rank_start
+        self.max_results = max_results
+        self.results: List[Dict] = []
+        self.failed = False
+        self._seen: Set[str] = set()
+        self._chunks: List[bytes] = []
+        # lxml 可用时使用 lxml 的拉取式解析器，否则使用标准库的同名实现
+        module = etree if LXML_AVAILABLE else ElementTree
+        self._parser = module.XMLPullParser(events=("end",))
+
+    @property
+    def done(self) -> bool:
+        return self.max_results is not None and len(self.results) >= self.max_results
+
+    @property
+    def text(self) -> str:
+        return b"".join(self._chunks).decode("utf-8", errors="replace")
+
+    def feed(self, chunk: bytes) -> bool:
+        """
+        喂入一块响应内容。
+        :return: 是否已凑够所需结果数
+        """
+        self._chunks.append(chunk)
+        if self.failed or self.done:
+            return self.done
+        try:
+            self._parser.feed(chunk)
+            self._read_events()
+        except (ElementTree.ParseError, SyntaxError, ValueError):
+            # lxml 的 XMLSyntaxError 也是 SyntaxError 的子类
+            self.failed = True
+        return self.done
+
+    def close(self) -> List[Dict]:
+        """结束解析，返回结果列表"""
+        if not self.failed and not self.done:
+            try:
+                self._parser.close()
+                self._read_events()
+            except (ElementTree.ParseError, SyntaxError, ValueError):
+                self.failed = True
+        return self.results
+
+    def _read_events(self) -> None:
+        for _, elem in self._parser.read_events():
+            if elem.tag != "item" or self.done:
+                continue
+            title = (elem.findtext("title") or "").strip()
+            url = (elem.findtext("link") or "").strip()
+            if title and url:
+                abstract = (elem.findtext("description") or "").strip()
+                _add_result(self.results, self._seen, title, url, abstract, self.rank_start)
+            elem.clear()
+
+
+def parse_bing_rss(data: bytes, rank_start: int = 0, max_results: Optional[int] = None) -> List[Dict]:
+    """
+    解析完整的必应 RSS 响应。
+    :return: 结果列表，内容为空或不是合法 RSS 时为空列表
+    """
+    parser = StreamingBingRssParser(rank_start, max_results)
+    parser.feed(data)
+    return parser.close()
@@ -0,0 +1,131 @@
+"""
+必应结果页解析基准测试
+
+对 fixtures/bing 下的合成必应结果页（以及命令行额外指定的页面，如 debug/bing_*.html），
+分别用 lxml 快速路径和 BeautifulSoup 解析，输出每页平均解析耗时与内存分配峰值，
+并校验两种解析方式得到的结果一致。内存峰值由 tracemalloc 统计，只包含 Python 对象的分配，
+lxml 在 C 层的解析树不计入。流式一列按 STREAM_CHUNK_SIZE 分块喂入、只取前 --stream-results 个结果，
+读取比例为提前结束时已读取的字节占整页的比例。
+同名的 .xml 文件是同一查询的 RSS（format=rss）响应，会额外对比 RSS 与 HTML 的字节数和解析耗时。
+
+fixtures/bing 下的页面是手工构造的，只仿照了真实结果页的结构，体积由重复的 CSS 规则填充，
+用于核对两种解析方式结果一致；耗时、读取比例与字节比例不代表真实页面，
+需要真实数据时请用诊断转储（debug/ 目录）保存的页面运行。
+
+用法（在插件目录的上一级执行）：
+    python -m doubao_search_plugin.bing_parser_benchmark --rounds 50
+    python -m doubao_search_plugin.bing_parser_benchmark doubao_search_plugin/debug/bing_www_search_*.html
+"""
+
+import argparse
+import glob
+import os
+import time
+import tracemalloc
+
+from .bing_parser import LXML_AVAILABLE, STREAM_CHUNK_SIZE, StreamingBingParser, parse_bing_html, parse_bing_rss
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "bing")
+
+
+def _measure(text: str, use_lxml: bool, rounds: int):
+    """返回 (每页平均耗时毫秒, 单次解析内存分配峰值KB, 结果)"""
+    result = parse_bing_html(text, use_lxml=use_lxml)  # 预热
+    start = time.perf_counter()
+    for _ in range(rounds):
+        parse_bing_html(text, use_lxml=use_lxml)
+    elapsed_ms = (time.perf_counter() - start) / rounds * 1000
+
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        parse_bing_html(text, use_lxml=use_lxml)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return elapsed_ms, peak / 1024, result
+
+
+def _measure_stream(raw: bytes, max_results: int, rounds: int):
+    """返回 (每页平均耗时毫秒, 提前结束时已读取的字节数)"""
+    consumed = 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        parser = StreamingBingParser(max_results=max_results)
+        consumed = 0
+        for offset in range(0, len(raw), STREAM_CHUNK_SIZE):
+            chunk = raw[offset:offset + STREAM_CHUNK_SIZE]
+            consumed += len(chunk)
+            if parser.feed(chunk):
+                break
+        parser.close()
+    return (time.perf_counter() - start) / rounds * 1000, consumed
+
+
+def _compare_rss(files, rounds: int) -> None:
+    """对有同名 .xml 的页面，对比 RSS 与 HTML 的字节数和解析耗时"""
+    pairs = [(path, os.path.splitext(path)[0] + ".xml") for path in files]
+    pairs = [(html_path, xml_path) for html_path, xml_path in pairs if os.path.exists(xml_path)]
+    if not pairs:
+        return
+    print()
+    print(f"{'RSS 对比':<34}{'HTML KB':>9}{'RSS KB':>8}{'字节比':>8}{'HTML ms':>9}{'RSS ms':>8}{'结果':>6}")
+    for html_path, xml_path in pairs:
+        with open(html_path, "rb") as f:
+            html_raw = f.read()
+        with open(xml_path, "rb") as f:
+            rss_raw = f.read()
+        html_text = html_raw.decode("utf-8", errors="replace")
+        html_ms, _, _ = _measure(html_text, True, rounds)
+        parse_bing_rss(rss_raw)  # 预热
+        start = time.perf_counter()
+        for _ in range(rounds):
+            results = parse_bing_rss(rss_raw)
+        rss_ms = (time.perf_counter() - start) / rounds * 1000
+        print(
+            f"{os.path.basename(xml_path)[:33]:<34}{len(html_raw) / 1024:>9.1f}{len(rss_raw) / 1024:>8.1f}"
+            f"{len(rss_raw) / len(html_raw):>8.1%}{html_ms:>9.2f}{rss_ms:>8.2f}{len(results):>6}"
+        )
+
+
+def main(paths, rounds: int, stream_results: int):
+    files = sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.html")))
+    for pattern in paths:
+        files.extend(sorted(glob.glob(pattern)))
+    if not files:
+        print("没有找到可用的必应页面")
+        return
+    if not LXML_AVAILABLE:
+        print("lxml 未安装，快速路径会退回 BeautifulSoup")
+
+    print(
+        f"{'页面':<36}{'KB':>7}{'结果':>6}{'lxml ms':>10}{'bs4 ms':>10}{'加速':>7}"
+        f"{'lxml峰值KB':>12}{'bs4峰值KB':>11}{'流式ms':>9}{'读取':>7}"
+    )
+    total_fast = total_slow = 0.0
+    for path in files:
+        with open(path, "rb") as f:
+            raw = f.read()
+        text = raw.decode("utf-8", errors="replace")
+        fast_ms, fast_peak, fast_result = _measure(text, True, rounds)
+        slow_ms, slow_peak, slow_result = _measure(text, False, rounds)
+        stream_ms, consumed = _measure_stream(raw, stream_results, rounds)
+        total_fast += fast_ms
+        total_slow += slow_ms
+        mark = "" if fast_result == slow_result else "  (结果不一致)"
+        print(
+            f"{os.path.basename(path)[:35]:<36}{len(raw) / 1024:>7.1f}{len(fast_result[0]):>6}"
+            f"{fast_ms:>10.2f}{slow_ms:>10.2f}{slow_ms / fast_ms if fast_ms else 0:>6.1f}x"
+            f"{fast_peak:>12.1f}{slow_peak:>11.1f}{stream_ms:>9.2f}{consumed / len(raw) if raw else 0:>7.0%}{mark}"
+        )
+    print(f"平均每页：lxml {total_fast / len(files):.2f}ms，BeautifulSoup {total_slow / len(files):.2f}ms")
+    _compare_rss(files, rounds)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="必应结果页解析基准测试")
+    parser.add_argument("paths", nargs="*", help="额外的必应页面文件（支持通配符）")
+    parser.add_argument("--rounds", type=int, default=50, help="每个页面的解析次数")
+    parser.add_argument("--stream-results", type=int, default=5, help="流式解析提前结束所需的结果数")
+    args = parser.parse_args()
+    main(args.paths, args.rounds, args.stream_results)
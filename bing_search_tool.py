@@ -1,73 +1,115 @@
-from typing import List, Dict
-import requests
-from bs4 import BeautifulSoup
-import random
-import os
-import toml
-
-# 可选：你可以根据需要扩展 user_agents
-user_agents = [
-    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36 Edg/122.0.0.0',
-    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
-    'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:123.0) Gecko/20100101 Firefox/123.0',
-]
-
-HEADERS = {
-    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
-    "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
-    "Connection": "keep-alive",
-    "User-Agent": user_agents[0],
-}
-
-BING_SEARCH_URL = "https://www.bing.com/search?q="
-ABSTRACT_MAX_LENGTH = 300
-
-# 读取代理配置，优先从config.toml读取[proxy]节
-CONFIG_PATH = os.path.join(os.path.dirname(__file__), 'config.toml')
-if not os.path.exists(CONFIG_PATH):
-    CONFIG_PATH = os.path.join(os.path.dirname(__file__), '..', 'config.toml')
-PROXIES = None
-try:
-    if os.path.exists(CONFIG_PATH):
-        config = toml.load(CONFIG_PATH)
-        proxy_cfg = config.get('proxy', {})
-        use_proxy = proxy_cfg.get('use_proxy', False)
-        proxy_url = proxy_cfg.get('proxy_url', '')
-        if use_proxy and proxy_url:
-            PROXIES = {"http": proxy_url, "https": proxy_url}
-except Exception as e:
-    print(f"代理配置读取失败: {e}")
+import asyncio
+import threading
+from typing import Dict, List, Optional
 
-def search_bing(query: str, num_results: int = 10) -> List[Dict]:
+from .bing_engine import hedged_search
+from .config_loader import load_plugin_config
+from .http_client import run_sync
+from .result_cache import LRUCache, normalize_query
+from .result_store import get_result_store
+
+# 进程内必应结果缓存的默认配置，可在 config.toml 的 [bing_cache] 节覆盖
+DEFAULT_CACHE_SIZE = 64
+DEFAULT_CACHE_TTL = 1800.0  # 30分钟
+DEFAULT_CACHE_MAX_BYTES = 2 * 1024 * 1024
+
+_cache: Optional[LRUCache] = None
+_cache_enabled = True
+_cache_ttl = DEFAULT_CACHE_TTL  # 磁盘结果存储中的条目也按这个时间过期
+_cache_lock = threading.Lock()
+_counters = {"memory_hits": 0, "store_hits": 0, "live": 0}
+
+
+def _get_cache() -> Optional[LRUCache]:
+    """获取进程内共享的必应结果缓存，按 config.toml 的 [bing_cache] 节创建，禁用时返回 None"""
+    global _cache, _cache_enabled, _cache_ttl
+    if _cache is not None or not _cache_enabled:
+        return _cache
+    with _cache_lock:
+        if _cache is not None or not _cache_enabled:
+            return _cache
+        cache_cfg = load_plugin_config('bing_cache')
+        _cache_ttl = float(cache_cfg.get('ttl', DEFAULT_CACHE_TTL))
+        if not cache_cfg.get('enabled', True):
+            _cache_enabled = False
+            return None
+        _cache = LRUCache(
+            max_size=cache_cfg.get('max_size', DEFAULT_CACHE_SIZE),
+            ttl=_cache_ttl,
+            max_bytes=cache_cfg.get('max_bytes', DEFAULT_CACHE_MAX_BYTES),
+        )
+        return _cache
+
+
+def _cache_key(query: str, num_results: int) -> str:
+    return f"{num_results}|{normalize_query(query)}"
+
+
+async def get_cached_results(query: str, num_results: int = 10) -> Optional[List[Dict]]:
+    """
+    依次查询进程内缓存与磁盘结果存储。
+    :return: 结果列表的副本；都未命中时返回 None
+    """
+    key = _cache_key(query, num_results)
+    cache = _get_cache()
+    cached = cache.get(key) if cache is not None else None
+    if cached is not None:
+        _counters["memory_hits"] += 1
+        return [dict(item) for item in cached]
+    store = get_result_store()
+    if store:
+        cached = await asyncio.to_thread(store.get, "bing", key)
+        if cached is not None:
+            _counters["store_hits"] += 1
+            if cache is not None:
+                cache.set(key, cached)
+            return [dict(item) for item in cached]
+    return None
+
+
+async def put_cached_results(query: str, num_results: int, results: List[Dict]) -> None:
+    """写入进程内缓存与磁盘结果存储，空结果不缓存"""
+    if not results:
+        return
+    key = _cache_key(query, num_results)
+    cache = _get_cache()
+    if cache is not None:
+        cache.set(key, [dict(item) for item in results])
+    store = get_result_store()
+    if store:
+        await asyncio.to_thread(store.set, "bing", key, results, _cache_ttl)
+
+
+def cache_stats() -> Dict[str, object]:
+    """返回必应结果缓存的命中统计：进程内缓存、磁盘存储命中数与实际抓取次数"""
+    cache = _get_cache()
+    stats: Dict[str, object] = dict(_counters)
+    total = stats["memory_hits"] + stats["store_hits"] + stats["live"]
+    stats["hit_rate"] = (stats["memory_hits"] + stats["store_hits"]) / total if total else 0.0
+    stats["memory"] = cache.stats() if cache is not None else None
+    return stats
+
+
+async def search_bing_async(query: str, num_results: int = 10) -> List[Dict]:
     """
     输入query，返回必应搜索结果列表，每项包含title、url、abstract、rank。
+    抓取与解析由 bing_engine 完成：对冲请求国际版与中国版必应，熔断中的站点自动跳过。
+    结果按归一化后的查询与结果数缓存，先查进程内 LRU，再查磁盘结果存储。
     """
     if not query:
         return []
-    results = []
-    url = BING_SEARCH_URL + requests.utils.quote(query)
-    headers = HEADERS.copy()
-    headers["User-Agent"] = random.choice(user_agents)
+    cached = await get_cached_results(query, num_results)
+    if cached is not None:
+        return cached
+    _counters["live"] += 1
     try:
-        resp = requests.get(url, headers=headers, timeout=8, proxies=PROXIES)
-        resp.raise_for_status()
-        soup = BeautifulSoup(resp.text, "lxml")
-        items = soup.select("li.b_algo")
-        for idx, item in enumerate(items[:num_results], 1):
-            title_tag = item.find("h2")
-            link = title_tag.find("a") if title_tag else None
-            title = link.text.strip() if link else ""
-            url = link["href"] if link and link.has_attr("href") else ""
-            abstract_tag = item.find("p")
-            abstract = abstract_tag.text.strip() if abstract_tag else ""
-            if len(abstract) > ABSTRACT_MAX_LENGTH:
-                abstract = abstract[:ABSTRACT_MAX_LENGTH]
-            results.append({
-                "title": title,
-                "url": url,
-                "abstract": abstract,
-                "rank": idx
-            })
-        return results
+        results = await hedged_search(query, num_results)
     except Exception:
         return []
+    await put_cached_results(query, num_results, results)
+    return results
+
+
+def search_bing(query: str, num_results: int = 10) -> List[Dict]:
+    """search_bing_async 的同步接口，在共享的后台事件循环中执行"""
+    return run_sync(search_bing_async(query, num_results))
@@ -0,0 +1,83 @@
+"""
+浏览器搜索取消检查
+
+模拟 DuckDuckGoSearchAction 的调用链：Action 通过 single-flight 等待搜索，搜索在 BrowserExecutor 中执行浏览器操作。
+线程池只有一个线程，先占满它，再发起两个查询：一个在执行中、一个在排队。取消两个 Action 后检查：
+- 执行中的浏览器任务收到取消事件并提前结束
+- 排队中的任务从队列中移除，没有执行
+- 执行器与 single-flight 的计数反映了取消
+
+不启动真实浏览器，浏览器操作由按取消事件轮询的函数代替。
+
+用法（在插件目录的上一级执行）：
+    python -m doubao_search_plugin.browser_cancel_check
+"""
+
+import asyncio
+import threading
+import time
+
+from .chrome_pool import BrowserExecutor
+from .single_flight import SingleFlight
+
+
+def _fake_browser_search(name: str, duration: float, log: dict, started: threading.Event, cancel_event=None):
+    """模拟浏览器搜索：每 10ms 检查一次取消事件"""
+    started.set()
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        if cancel_event.is_set():
+            log[name] = "cancelled"
+            return None
+        time.sleep(0.01)
+    log[name] = "finished"
+    return name
+
+
+async def main() -> bool:
+    executor = BrowserExecutor(max_workers=1, max_queue=4)
+    flight = SingleFlight("duckduckgo")
+    log = {}
+    running_started = threading.Event()
+    queued_started = threading.Event()
+
+    running = asyncio.ensure_future(flight.do(
+        "running", lambda: executor.run(_fake_browser_search, "running", 5.0, log, running_started)
+    ))
+    # 同一查询的第二个 Action 被合并到同一个上游任务
+    running_twin = asyncio.ensure_future(flight.do(
+        "running", lambda: executor.run(_fake_browser_search, "running", 5.0, log, running_started)
+    ))
+    await asyncio.sleep(0.1)
+    queued = asyncio.ensure_future(flight.do(
+        "queued", lambda: executor.run(_fake_browser_search, "queued", 5.0, log, queued_started)
+    ))
+    await asyncio.sleep(0.1)
+
+    # 只取消一个等待者时，上游任务应继续
+    running.cancel()
+    await asyncio.sleep(0.1)
+    twin_alive = not running_twin.done() and "running" not in log
+
+    running_twin.cancel()
+    queued.cancel()
+    await asyncio.gather(running, running_twin, queued, return_exceptions=True)
+    await asyncio.sleep(0.2)
+
+    stats = executor.stats()
+    checks = {
+        "单个等待者取消时上游任务继续": twin_alive,
+        "执行中的任务收到取消事件": log.get("running") == "cancelled",
+        "排队中的任务没有执行": not queued_started.is_set() and "queued" not in log,
+        "执行器记录了两次取消且没有计为完成": stats["cancelled"] == 2 and stats["completed"] == 0 and stats["pending"] == 0,
+        "single-flight 记录了两次放弃": flight.stats()["abandoned"] == 2,
+    }
+    executor.shutdown()
+    for name, ok in checks.items():
+        print(f"{'通过' if ok else '失败'}  {name}")
+    print(f"执行器统计: {stats}，single-flight 统计: {flight.stats()}")
+    return all(checks.values())
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if asyncio.run(main()) else 1)
@@ -0,0 +1,516 @@
+"""
+常驻无头 Chrome 池
+
+为需要浏览器的搜索路径（DuckDuckGo）维护 N 个长期存活的无头 Chrome：
+- 查询之间复用浏览器与标签页，不再每次启动新 Chrome；chromedriver 路径只解析一次
+- 每个工作者使用自己的 user-data-dir，避免多个实例争用同一个配置目录的锁
+- 借出前做健康检查，失效的工作者就地重建
+- 完成指定次数的查询或进程树内存（RSS）超限后回收重建，避免长期运行后内存膨胀
+- 池创建后在后台预热，首个查询无需等待浏览器启动
+- 浏览器操作在专用的有界线程池中执行，提供异步接口：排队任务数有上限，调用方取消时通知任务尽早结束
+- 页面就绪检测：在一个轮询循环里同时等待多个候选选择器，共用一个截止时间，并返回命中的选择器
+- 资源屏蔽（默认开启）：禁用图片，并通过 CDP 的 Network.setBlockedURLs 屏蔽字体、图标、媒体与跟踪脚本，
+  只抓取文字结果时可明显缩短页面加载时间并节省流量
+"""
+
+import asyncio
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+
+from .config_loader import load_plugin_config
+
+try:
+    import psutil
+
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+DEFAULT_POOL_SIZE = 2
+DEFAULT_MAX_QUERIES = 50  # 每个工作者完成多少次查询后回收
+DEFAULT_MAX_RSS_MB = 800  # 浏览器进程树内存上限（MB），需要安装 psutil，0 表示不限
+DEFAULT_ACQUIRE_TIMEOUT = 60.0  # 所有工作者都忙时最多等待的秒数
+DEFAULT_MAX_QUEUE = 8  # 浏览器线程池中等待与执行中的任务总数上限
+DEFAULT_READY_TIMEOUT = 8.0  # 等待任一候选选择器出现的总时长（秒）
+DEFAULT_READY_POLL = 0.1  # 就绪检测的轮询间隔（秒）
+
+# 资源屏蔽时不加载的 URL 模式（Network.setBlockedURLs 支持 * 通配符）
+DEFAULT_BLOCKED_URLS = [
+    # 图片与图标
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico", "*favicon*",
+    # 字体
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    # 音视频
+    "*.mp4", "*.webm", "*.mp3",
+    # 广告与跟踪
+    "*improving.duckduckgo.com*", "*duckduckgo.com/y.js*", "*doubleclick.net*",
+    "*google-analytics.com*", "*googletagmanager.com*", "*googlesyndication.com*",
+]
+# 资源屏蔽时的浏览器偏好：2 表示禁止
+BLOCKING_PREFS = {
+    "profile.managed_default_content_settings.images": 2,
+    "profile.default_content_setting_values.notifications": 2,
+    "profile.default_content_setting_values.geolocation": 2,
+}
+DEFAULT_PROFILE_ROOT = os.path.join(os.path.expanduser("~"), "chrome_profile_duckduckgo")
+DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/91.0.4472.124 Safari/537.36"
+)
+
+_driver_path: Optional[str] = None
+_driver_path_lock = threading.Lock()
+
+
+def default_options(user_data_dir: str) -> Options:
+    """无头 Chrome 的默认启动参数，模拟普通桌面用户"""
+    chrome_options = Options()
+    chrome_options.add_argument(f"user-data-dir={user_data_dir}")
+    chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--window-size=1920,1080")
+    chrome_options.add_argument(f"user-agent={DEFAULT_USER_AGENT}")
+    return chrome_options
+
+
+# 按顺序检查候选选择器，返回第一个在页面中存在的选择器，都不存在时返回 null
+_FIRST_MATCH_SCRIPT = """
+var selectors = arguments[0];
+for (var i = 0; i < selectors.length; i++) {
+    try {
+        if (document.querySelector(selectors[i])) { return selectors[i]; }
+    } catch (e) {}
+}
+return null;
+"""
+
+
+def wait_for_any(
+    driver: webdriver.Chrome,
+    selectors: List[str],
+    timeout: float = DEFAULT_READY_TIMEOUT,
+    poll: float = DEFAULT_READY_POLL,
+    cancel_event: Optional[threading.Event] = None,
+) -> Optional[str]:
+    """
+    在一个轮询循环中等待任一候选选择器出现，所有选择器共用一个截止时间。
+    :param selectors: 候选 CSS 选择器，同时出现时按列表顺序返回靠前的一个
+    :param timeout: 总等待时长（秒）
+    :param poll: 轮询间隔（秒）
+    :param cancel_event: 取消事件，置位后立即停止等待
+    :return: 命中的选择器；超时、取消或页面出错时返回 None
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            matched = driver.execute_script(_FIRST_MATCH_SCRIPT, list(selectors))
+        except WebDriverException:
+            # 页面仍在跳转时脚本可能执行失败，下一轮再试
+            matched = None
+        if matched:
+            return matched
+        if cancel_event is not None and cancel_event.is_set():
+            return None
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        time.sleep(min(poll, remaining))
+
+
+def apply_blocking_prefs(chrome_options: Options) -> Options:
+    """在启动参数中禁用图片加载，不覆盖已有的其他偏好"""
+    prefs = dict(chrome_options.experimental_options.get("prefs", {}))
+    prefs.update(BLOCKING_PREFS)
+    chrome_options.add_experimental_option("prefs", prefs)
+    chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+    return chrome_options
+
+
+def block_urls(driver: webdriver.Chrome, patterns: List[str] = DEFAULT_BLOCKED_URLS) -> bool:
+    """
+    通过 CDP 让浏览器不再请求匹配的资源，对该浏览器之后加载的所有页面生效。
+    :return: 是否设置成功
+    """
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(patterns)})
+        return True
+    except (WebDriverException, AttributeError) as e:
+        print(f"设置资源屏蔽失败: {e}")
+        return False
+
+
+def _make_service() -> Service:
+    """chromedriver 路径只通过 webdriver-manager 解析一次，失败时交给 selenium 自行查找"""
+    global _driver_path
+    if _driver_path is None:
+        with _driver_path_lock:
+            if _driver_path is None:
+                try:
+                    from webdriver_manager.chrome import ChromeDriverManager
+
+                    _driver_path = ChromeDriverManager().install()
+                except Exception as e:
+                    print(f"webdriver-manager 获取 chromedriver 失败，改用 selenium 自动查找: {e}")
+                    _driver_path = ""
+    return Service(_driver_path) if _driver_path else Service()
+
+
+class ChromeWorker:
+    """池中的一个常驻浏览器"""
+
+    def __init__(self, slot: int, driver: webdriver.Chrome, user_data_dir: str):
+        self.slot = slot
+        self.driver = driver
+        self.user_data_dir = user_data_dir
+        self.queries = 0
+        self.created_at = time.monotonic()
+
+    def healthy(self) -> bool:
+        """浏览器与 chromedriver 是否仍可响应"""
+        try:
+            return self.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def rss_bytes(self) -> int:
+        """chromedriver 及其所有子进程（浏览器、渲染进程）占用的内存，psutil 不可用时返回 0"""
+        if not PSUTIL_AVAILABLE:
+            return 0
+        try:
+            process = psutil.Process(self.driver.service.process.pid)
+            return sum(p.memory_info().rss for p in [process] + process.children(recursive=True))
+        except (psutil.Error, AttributeError):
+            return 0
+
+    def reset(self) -> None:
+        """查询结束后关闭多余标签页并回到空白页，释放页面占用的内存"""
+        handles = self.driver.window_handles
+        for handle in handles[1:]:
+            self.driver.switch_to.window(handle)
+            self.driver.close()
+        self.driver.switch_to.window(handles[0])
+        self.driver.get("about:blank")
+
+    def quit(self) -> None:
+        try:
+            self.driver.quit()
+        except Exception as e:
+            print(f"关闭浏览器时出错: {e}")
+
+
+class ChromePool:
+    """常驻无头 Chrome 池，线程安全"""
+
+    def __init__(
+        self,
+        size: int = DEFAULT_POOL_SIZE,
+        max_queries: int = DEFAULT_MAX_QUERIES,
+        max_rss_mb: int = DEFAULT_MAX_RSS_MB,
+        acquire_timeout: float = DEFAULT_ACQUIRE_TIMEOUT,
+        profile_root: str = DEFAULT_PROFILE_ROOT,
+        options_factory: Callable[[str], Options] = default_options,
+        block_resources: bool = True,
+        blocked_urls: Optional[List[str]] = None,
+    ):
+        """
+        :param size: 同时存活的浏览器数
+        :param max_queries: 每个浏览器完成多少次查询后回收重建
+        :param max_rss_mb: 浏览器进程树内存上限（MB），超过后回收重建，0 表示不限
+        :param acquire_timeout: 所有浏览器都忙时最多等待的秒数
+        :param profile_root: 用户数据目录的根目录，第 N 个浏览器使用其中的 worker-N
+        :param options_factory: 接收 user-data-dir、返回 Chrome 启动参数的函数
+        :param block_resources: 是否屏蔽图片、字体、图标与跟踪脚本
+        :param blocked_urls: 屏蔽的 URL 模式，不传则使用 DEFAULT_BLOCKED_URLS
+        """
+        self.size = max(1, int(size))
+        self.max_queries = max(1, int(max_queries))
+        self.max_rss_bytes = max(0, int(max_rss_mb)) * 1024 * 1024
+        self.acquire_timeout = float(acquire_timeout)
+        self.profile_root = os.path.abspath(profile_root)
+        self.options_factory = options_factory
+        self.block_resources = block_resources
+        self.blocked_urls = list(DEFAULT_BLOCKED_URLS if blocked_urls is None else blocked_urls)
+
+        self._cond = threading.Condition()
+        self._idle: List[ChromeWorker] = []
+        self._free_slots = list(range(self.size))  # 尚未启动浏览器的槽位
+        self._busy = 0
+        self._closed = False
+        self._counters = {"launched": 0, "reused": 0, "recycled": 0, "unhealthy": 0, "launch_failures": 0}
+
+    def _launch(self, slot: int) -> ChromeWorker:
+        user_data_dir = os.path.join(self.profile_root, f"worker-{slot}")
+        os.makedirs(user_data_dir, exist_ok=True)
+        chrome_options = self.options_factory(user_data_dir)
+        if self.block_resources:
+            apply_blocking_prefs(chrome_options)
+        driver = webdriver.Chrome(service=_make_service(), options=chrome_options)
+        if self.block_resources and self.blocked_urls:
+            block_urls(driver, self.blocked_urls)
+        with self._cond:
+            self._counters["launched"] += 1
+        return ChromeWorker(slot, driver, user_data_dir)
+
+    def acquire(self, timeout: Optional[float] = None) -> ChromeWorker:
+        """
+        借出一个浏览器，用完后必须调用 release；优先复用空闲的浏览器，没有时在空槽位上启动新的。
+        :param timeout: 所有浏览器都忙时最多等待的秒数，不传则使用池的默认值
+        :raise TimeoutError: 等待超时
+        :raise RuntimeError: 池已关闭
+        """
+        deadline = time.monotonic() + (self.acquire_timeout if timeout is None else timeout)
+        worker = None
+        slot = None
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Chrome 池已关闭")
+                if self._idle:
+                    worker = self._idle.pop()  # 后进先出，优先使用刚用过的浏览器
+                    break
+                if self._free_slots:
+                    slot = self._free_slots.pop(0)
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"等待空闲浏览器超时（{self.size} 个都在使用中）")
+                self._cond.wait(remaining)
+            self._busy += 1
+
+        if worker is not None:
+            if worker.healthy():
+                with self._cond:
+                    self._counters["reused"] += 1
+                return worker
+            with self._cond:
+                self._counters["unhealthy"] += 1
+            worker.quit()
+            slot = worker.slot
+        try:
+            return self._launch(slot)
+        except Exception:
+            with self._cond:
+                self._counters["launch_failures"] += 1
+                self._busy -= 1
+                self._free_slots.append(slot)
+                self._cond.notify()
+            raise
+
+    def release(self, worker: ChromeWorker, failed: bool = False) -> None:
+        """
+        归还浏览器；查询次数或内存超限、查询失败且浏览器已失效时回收，空出槽位下次重新启动。
+        :param failed: 本次查询是否出错
+        """
+        worker.queries += 1
+        retire = (
+            self._closed
+            or worker.queries >= self.max_queries
+            or (failed and not worker.healthy())
+            or (self.max_rss_bytes and worker.rss_bytes() > self.max_rss_bytes)
+        )
+        if not retire:
+            try:
+                worker.reset()
+            except WebDriverException:
+                retire = True
+        if retire:
+            worker.quit()
+        with self._cond:
+            self._busy -= 1
+            if retire:
+                self._counters["recycled"] += 1
+                self._free_slots.append(worker.slot)
+            else:
+                self._idle.append(worker)
+            self._cond.notify()
+
+    @contextmanager
+    def driver(self, timeout: Optional[float] = None) -> Iterator[webdriver.Chrome]:
+        """借出浏览器的上下文管理器，退出时自动归还；块内抛出异常时按失败归还"""
+        worker = self.acquire(timeout)
+        failed = False
+        try:
+            yield worker.driver
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.release(worker, failed)
+
+    def warm(self) -> None:
+        """在所有空槽位上预先启动浏览器，启动失败的槽位留到下次借出时再试"""
+        while True:
+            with self._cond:
+                if self._closed or not self._free_slots:
+                    return
+                slot = self._free_slots.pop(0)
+            try:
+                worker = self._launch(slot)
+            except Exception as e:
+                print(f"预热浏览器失败: {e}")
+                with self._cond:
+                    self._counters["launch_failures"] += 1
+                    self._free_slots.append(slot)
+                    self._cond.notify()
+                return
+            with self._cond:
+                # 启动期间池已关闭（如插件在预热时卸载）：直接关闭新浏览器，不再放回空闲列表
+                closed = self._closed
+                if closed:
+                    self._free_slots.append(slot)
+                else:
+                    self._idle.append(worker)
+                    self._cond.notify()
+            if closed:
+                worker.quit()
+                return
+
+    def close(self) -> None:
+        """关闭所有空闲浏览器；使用中的浏览器在归还时关闭"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for worker in idle:
+            worker.quit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            stats = dict(self._counters)
+            stats.update(idle=len(self._idle), busy=self._busy, free_slots=len(self._free_slots))
+            return stats
+
+
+class BrowserExecutor:
+    """
+    执行浏览器操作的专用有界线程池，线程数与浏览器数一致，事件循环只等待结果而不被阻塞。
+    任务函数通过关键字参数 cancel_event 接收取消事件，调用方取消时该事件被置位，任务应在检查点尽早返回。
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_POOL_SIZE, max_queue: int = DEFAULT_MAX_QUEUE):
+        """
+        :param max_workers: 同时执行的浏览器任务数
+        :param max_queue: 等待与执行中的任务总数上限，超过时直接拒绝
+        """
+        self.max_workers = max(1, int(max_workers))
+        self.max_queue = max(self.max_workers, int(max_queue))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="browser")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._counters = {"submitted": 0, "completed": 0, "rejected": 0, "cancelled": 0}
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        在浏览器线程池中执行 fn(*args, cancel_event=取消事件) 并等待结果。
+        :raise queue.Full: 排队任务数已达上限
+        """
+        with self._lock:
+            if self._pending >= self.max_queue:
+                self._counters["rejected"] += 1
+                raise queue.Full(f"浏览器任务排队已满（{self.max_queue}）")
+            self._pending += 1
+            self._counters["submitted"] += 1
+        cancel_event = threading.Event()
+        try:
+            future = self._executor.submit(fn, *args, cancel_event=cancel_event)
+        except RuntimeError:
+            # 线程池已关闭
+            self._task_done(None, cancel_event)
+            raise
+        future.add_done_callback(lambda f: self._task_done(f, cancel_event))
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # 还在排队的任务直接移出队列；已在执行的任务通过取消事件通知其尽早结束
+            cancel_event.set()
+            future.cancel()
+            raise
+
+    def _task_done(self, future: Optional[Future], cancel_event: threading.Event) -> None:
+        """任务结束时更新计数：结束前已被取消（移出队列或收到取消事件）的计为取消，否则计为完成"""
+        with self._lock:
+            self._pending -= 1
+            if future is None:
+                return
+            if future.cancelled() or cancel_event.is_set():
+                self._counters["cancelled"] += 1
+            else:
+                self._counters["completed"] += 1
+
+    def shutdown(self) -> None:
+        """关闭线程池，丢弃排队中的任务，不等待执行中的任务"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["pending"] = self._pending
+            return stats
+
+
+_pool: Optional[ChromePool] = None
+_pool_lock = threading.Lock()
+_executor: Optional[BrowserExecutor] = None
+
+
+def get_chrome_pool() -> ChromePool:
+    """获取进程内共享的 Chrome 池，按 config.toml 的 [chrome_pool] 节创建，创建后在后台线程中预热"""
+    global _pool
+    if _pool is not None:
+        return _pool
+    with _pool_lock:
+        if _pool is not None:
+            return _pool
+        pool_cfg = load_plugin_config('chrome_pool')
+        _pool = ChromePool(
+            size=pool_cfg.get('size', DEFAULT_POOL_SIZE),
+            max_queries=pool_cfg.get('max_queries', DEFAULT_MAX_QUERIES),
+            max_rss_mb=pool_cfg.get('max_rss_mb', DEFAULT_MAX_RSS_MB),
+            acquire_timeout=pool_cfg.get('acquire_timeout', DEFAULT_ACQUIRE_TIMEOUT),
+            profile_root=pool_cfg.get('profile_root') or DEFAULT_PROFILE_ROOT,
+            block_resources=pool_cfg.get('block_resources', True),
+            blocked_urls=pool_cfg.get('blocked_urls') or None,
+        )
+        if pool_cfg.get('warm', True):
+            threading.Thread(target=_pool.warm, name="chrome-pool-warm", daemon=True).start()
+        return _pool
+
+
+def get_browser_executor() -> BrowserExecutor:
+    """获取进程内共享的浏览器线程池，线程数与 [chrome_pool] 节的 size 一致"""
+    global _executor
+    if _executor is not None:
+        return _executor
+    with _pool_lock:
+        if _executor is not None:
+            return _executor
+        pool_cfg = load_plugin_config('chrome_pool')
+        _executor = BrowserExecutor(
+            max_workers=pool_cfg.get('size', DEFAULT_POOL_SIZE),
+            max_queue=pool_cfg.get('max_queue', DEFAULT_MAX_QUEUE),
+        )
+        return _executor
+
+
+def close_chrome_pool() -> None:
+    """关闭共享的浏览器线程池与 Chrome 池（插件卸载时调用）"""
+    global _pool, _executor
+    with _pool_lock:
+        pool, _pool = _pool, None
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown()
+    if pool is not None:
+        pool.close()
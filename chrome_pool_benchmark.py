@@ -0,0 +1,134 @@
+"""
+无头 Chrome 资源屏蔽基准测试
+
+在本地启动一个夹具服务器，提供 fixtures/duckduckgo 下的合成结果页，页面引用的图片、图标、字体和媒体文件
+由服务器按扩展名生成固定大小的内容并加上模拟的网络延迟。分别在开启与关闭资源屏蔽时用 ChromePool 中的浏览器
+反复加载该页面，输出每次加载的平均耗时（driver.get 到结果选择器出现）、服务器收到的请求数与传输字节数。
+服务器对所有响应禁止缓存，每次加载都会重新请求全部未被屏蔽的资源。
+合成页面与资源大小都是构造的，输出只用于比较两种模式，不代表真实页面的加载耗时。
+
+用法（在插件目录的上一级执行，需要本机已安装 Chrome）：
+    python -m doubao_search_plugin.chrome_pool_benchmark --rounds 10
+    python -m doubao_search_plugin.chrome_pool_benchmark --latency 100 doubao_search_plugin/debug/ddg_page.html
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .chrome_pool import ChromePool, wait_for_any
+
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "duckduckgo", "browser_results.html")
+READY_SELECTORS = ["article[data-testid='result']"]
+
+# 夹具服务器按扩展名生成的资源：(Content-Type, 字节数)
+ASSET_TYPES = {
+    ".ico": ("image/x-icon", 4 * 1024),
+    ".png": ("image/png", 60 * 1024),
+    ".jpg": ("image/jpeg", 30 * 1024),
+    ".webp": ("image/webp", 80 * 1024),
+    ".svg": ("image/svg+xml", 8 * 1024),
+    ".woff2": ("font/woff2", 45 * 1024),
+    ".mp4": ("video/mp4", 512 * 1024),
+}
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    """返回夹具页面与按扩展名生成的资源，并统计请求数与字节数"""
+
+    page = b""
+    latency = 0.0
+    lock = threading.Lock()
+    requests = 0
+    bytes_sent = 0
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/":
+            content_type, body = "text/html; charset=utf-8", self.page
+        else:
+            ext = os.path.splitext(path)[1]
+            if ext not in ASSET_TYPES:
+                self.send_error(404)
+                return
+            content_type, size = ASSET_TYPES[ext]
+            body = b"\0" * size
+            time.sleep(self.latency)
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+        with self.lock:
+            type(self).requests += 1
+            type(self).bytes_sent += len(body)
+
+    def log_message(self, format, *args):
+        return None
+
+    @classmethod
+    def reset(cls) -> None:
+        with cls.lock:
+            cls.requests = 0
+            cls.bytes_sent = 0
+
+
+def _measure(url: str, block: bool, rounds: int, profile_root: str):
+    """返回 (每次加载平均耗时毫秒, 每次加载的请求数, 每次加载的KB, 结果选择器是否出现)"""
+    pool = ChromePool(size=1, max_queries=rounds + 1, profile_root=profile_root, block_resources=block)
+    worker = pool.acquire()
+    try:
+        driver = worker.driver
+        driver.get(url)  # 预热
+        wait_for_any(driver, READY_SELECTORS)
+        _FixtureHandler.reset()
+        ready = True
+        start = time.perf_counter()
+        for _ in range(rounds):
+            driver.get(url)
+            ready = wait_for_any(driver, READY_SELECTORS) is not None and ready
+        elapsed_ms = (time.perf_counter() - start) / rounds * 1000
+        return elapsed_ms, _FixtureHandler.requests / rounds, _FixtureHandler.bytes_sent / rounds / 1024, ready
+    finally:
+        pool.release(worker)
+        pool.close()
+
+
+def main(page_path: str, rounds: int, latency_ms: float):
+    with open(page_path, "rb") as f:
+        _FixtureHandler.page = f.read()
+    _FixtureHandler.latency = latency_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FixtureHandler)
+    threading.Thread(target=server.serve_forever, name="fixture-server", daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/?q=python+asyncio"
+    profile_root = tempfile.mkdtemp(prefix="chrome-pool-benchmark-")
+
+    print(f"页面: {os.path.basename(page_path)}，资源延迟 {latency_ms:.0f}ms，每种模式加载 {rounds} 次")
+    print(f"{'模式':<10}{'加载 ms':>10}{'请求数':>8}{'KB':>10}{'结果':>6}")
+    rows = []
+    try:
+        for block in (False, True):
+            elapsed_ms, requests, kb, ready = _measure(url, block, rounds, os.path.join(profile_root, str(block)))
+            rows.append((elapsed_ms, kb))
+            label = "屏蔽资源" if block else "不屏蔽"
+            print(f"{label:<10}{elapsed_ms:>10.1f}{requests:>8.1f}{kb:>10.1f}{'是' if ready else '否':>6}")
+    finally:
+        server.shutdown()
+        shutil.rmtree(profile_root, ignore_errors=True)
+    (off_ms, off_kb), (on_ms, on_kb) = rows
+    if off_ms and off_kb:
+        print(f"屏蔽后加载耗时为原来的 {on_ms / off_ms:.0%}，传输字节为原来的 {on_kb / off_kb:.0%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="无头 Chrome 资源屏蔽基准测试")
+    parser.add_argument("page", nargs="?", default=FIXTURE_PATH, help="夹具页面，默认使用 fixtures/duckduckgo/browser_results.html")
+    parser.add_argument("--rounds", type=int, default=10, help="每种模式的加载次数")
+    parser.add_argument("--latency", type=float, default=50.0, help="每个资源请求的模拟延迟（毫秒）")
+    args = parser.parse_args()
+    main(args.page, args.rounds, args.latency)
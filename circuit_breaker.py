@@ -0,0 +1,153 @@
+"""
+按站点的熔断器
+
+站点连续拒绝请求（403、跳转到验证/登录页、网络错误）时暂停向其发请求：
+- closed：正常放行，连续失败达到阈值后打开
+- open：直接拒绝，不发请求；打开时长按指数退避增长并加随机抖动
+- half-open：打开时间到后只放行一个探测请求，成功则关闭，失败则以更长的退避重新打开
+"""
+
+import random
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+DEFAULT_FAILURE_THRESHOLD = 3  # 连续失败多少次后打开
+DEFAULT_BASE_BACKOFF = 5.0  # 第一次打开的时长（秒）
+DEFAULT_MAX_BACKOFF = 300.0  # 打开时长上限（秒）
+DEFAULT_JITTER = 0.2  # 打开时长的随机抖动比例
+DEFAULT_PROBE_TIMEOUT = 30.0  # 探测请求超过该时间未回报结果时允许新的探测（秒）
+
+
+class CircuitBreaker:
+    """单个站点的熔断器，线程安全"""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        base_backoff: float = DEFAULT_BASE_BACKOFF,
+        max_backoff: float = DEFAULT_MAX_BACKOFF,
+        jitter: float = DEFAULT_JITTER,
+        probe_timeout: float = DEFAULT_PROBE_TIMEOUT,
+    ):
+        self.name = name
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.base_backoff = float(base_backoff)
+        self.max_backoff = float(max_backoff)
+        self.jitter = max(0.0, float(jitter))
+        self.probe_timeout = float(probe_timeout)
+
+        self._lock = threading.Lock()
+        self._state = STATE_CLOSED
+        self._failures = 0  # 当前连续失败次数
+        self._trips = 0  # 连续打开次数，决定退避时长
+        self._open_until = 0.0
+        self._probe_started: Optional[float] = None
+        self._rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == STATE_OPEN and time.monotonic() >= self._open_until:
+                return STATE_HALF_OPEN
+            return self._state
+
+    def is_open(self) -> bool:
+        """是否处于打开状态且尚未到探测时间，不占用探测名额"""
+        with self._lock:
+            return self._state == STATE_OPEN and time.monotonic() < self._open_until
+
+    def retry_after(self) -> float:
+        """距离允许探测还需等待的秒数"""
+        with self._lock:
+            if self._state != STATE_OPEN:
+                return 0.0
+            return max(0.0, self._open_until - time.monotonic())
+
+    def allow(self) -> bool:
+        """
+        判断本次请求是否放行。
+        :return: True 表示可以发请求，请求结束后需调用 record_success 或 record_failure
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self._state == STATE_CLOSED:
+                return True
+            if self._state == STATE_OPEN:
+                if now < self._open_until:
+                    self._rejected += 1
+                    return False
+                self._state = STATE_HALF_OPEN
+                self._probe_started = None
+            # 半开状态只放行一个探测请求；探测请求被取消而没有回报时，超时后允许新的探测
+            if self._probe_started is None or now - self._probe_started >= self.probe_timeout:
+                self._probe_started = now
+                return True
+            self._rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = STATE_CLOSED
+            self._failures = 0
+            self._trips = 0
+            self._probe_started = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == STATE_HALF_OPEN or self._failures >= self.failure_threshold:
+                self._trip_locked()
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "state": self._state,
+                "failures": self._failures,
+                "trips": self._trips,
+                "rejected": self._rejected,
+                "retry_after": round(max(0.0, self._open_until - time.monotonic()), 3)
+                if self._state == STATE_OPEN else 0.0,
+            }
+
+    def _trip_locked(self) -> None:
+        """打开熔断器，打开时长按 2^次数 指数增长并加随机抖动"""
+        backoff = min(self.max_backoff, self.base_backoff * (2 ** self._trips))
+        backoff *= 1 + random.uniform(-self.jitter, self.jitter)
+        self._state = STATE_OPEN
+        self._open_until = time.monotonic() + backoff
+        self._trips += 1
+        self._probe_started = None
+
+
+# 按站点共享的熔断器，必应、DuckDuckGo、百度等搜索路径共用
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def host_of(url: str) -> str:
+    """从url中取出站点名，如 https://cn.bing.com/search?q=x -> cn.bing.com"""
+    return urlparse(url).netloc or url
+
+
+def get_breaker(host: str) -> CircuitBreaker:
+    """获取指定站点的共享熔断器"""
+    breaker = _breakers.get(host)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(host)
+            if breaker is None:
+                breaker = CircuitBreaker(host)
+                _breakers[host] = breaker
+    return breaker
+
+
+def all_stats() -> Dict[str, Dict[str, object]]:
+    """返回所有站点熔断器的状态"""
+    return {host: breaker.stats() for host, breaker in list(_breakers.items())}
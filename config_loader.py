@@ -0,0 +1,42 @@
+"""
+插件配置读取
+
+不经过插件实例的模块（结果存储、必应缓存、Chrome 池、诊断转储、HTTP 抓取）共用的 config.toml 读取：
+- 先找插件目录下的 config.toml，找不到时再找上一级目录
+- 按节返回配置，文件不存在、节不存在或解析失败时返回空字典，由调用方使用默认值
+"""
+
+import os
+from typing import Any, Dict, Optional
+
+import toml
+
+
+def find_config_path() -> Optional[str]:
+    """
+    查找 config.toml，优先插件目录，其次上一级目录。
+    :return: 配置文件路径，都不存在时返回 None
+    """
+    for config_path in (
+        os.path.join(os.path.dirname(__file__), 'config.toml'),
+        os.path.join(os.path.dirname(__file__), '..', 'config.toml'),
+    ):
+        if os.path.exists(config_path):
+            return config_path
+    return None
+
+
+def load_plugin_config(section: str) -> Dict[str, Any]:
+    """
+    读取 config.toml 中的一节。
+    :param section: 节名，如 store、chrome_pool
+    :return: 该节的配置，读取失败时返回空字典
+    """
+    config_path = find_config_path()
+    if config_path is None:
+        return {}
+    try:
+        return toml.load(config_path).get(section, {})
+    except Exception as e:
+        print(f"配置 [{section}] 读取失败: {e}")
+        return {}
@@ -0,0 +1,178 @@
+"""
+搜索诊断转储
+
+把抓取到的原始页面保存到本地，便于排查解析失败或被反爬拦截的问题：
+- 三种模式：off（关闭）、sampled（每 N 次成功请求抽样一次，失败总是保存）、on_error（只在失败时保存）
+- 转储交给有界队列和后台线程写盘，队列满时直接丢弃，不阻塞搜索
+- 转储目录按文件数与总字节数上限轮转，超出时删除最旧的文件
+"""
+
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from typing import Dict, Optional
+
+from .config_loader import load_plugin_config
+
+MODE_OFF = "off"
+MODE_SAMPLED = "sampled"
+MODE_ON_ERROR = "on_error"
+MODES = (MODE_OFF, MODE_SAMPLED, MODE_ON_ERROR)
+
+DEFAULT_MODE = MODE_ON_ERROR
+DEFAULT_SAMPLE_RATE = 20  # sampled 模式下每 N 次成功请求保存一次
+DEFAULT_DUMP_DIR = os.path.join(os.path.dirname(__file__), "debug")
+DEFAULT_MAX_FILES = 50
+DEFAULT_MAX_BYTES = 20 * 1024 * 1024  # 转储目录总大小上限：20MB
+DEFAULT_QUEUE_SIZE = 16
+
+_UNSAFE_CHARS = re.compile(r"[^\w.-]+")
+
+
+def is_debug_enabled(logger) -> bool:
+    """
+    判断日志器是否输出 DEBUG 级别，用于跳过只为调试日志准备的开销较大的计算。
+    :param logger: get_logger 返回的日志器或标准库 Logger
+    """
+    check = getattr(logger, "isEnabledFor", None)
+    if check is not None:
+        try:
+            return bool(check(logging.DEBUG))
+        except Exception:
+            pass
+    return logging.getLogger(getattr(logger, "name", None)).isEnabledFor(logging.DEBUG)
+
+
+class DiagnosticsDumper:
+    """按模式抽样保存页面，后台线程写盘，线程安全"""
+
+    def __init__(
+        self,
+        mode: str = DEFAULT_MODE,
+        sample_rate: int = DEFAULT_SAMPLE_RATE,
+        dump_dir: str = DEFAULT_DUMP_DIR,
+        max_files: int = DEFAULT_MAX_FILES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+    ):
+        self.mode = mode if mode in MODES else DEFAULT_MODE
+        self.sample_rate = max(1, int(sample_rate))
+        self.dump_dir = os.path.abspath(dump_dir)
+        self.max_files = max(1, int(max_files))
+        self.max_bytes = max(1, int(max_bytes))
+
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(1, int(queue_size)))
+        self._seen = 0
+        self._dumped = 0
+        self._dropped = 0
+        self._writer: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != MODE_OFF
+
+    def should_dump(self, error: bool = False) -> bool:
+        """按模式判断本次是否需要保存"""
+        if self.mode == MODE_OFF:
+            return False
+        if error:
+            return True
+        if self.mode != MODE_SAMPLED:
+            return False
+        with self._lock:
+            self._seen += 1
+            return (self._seen - 1) % self.sample_rate == 0
+
+    def dump(self, name: str, content: str, error: bool = False) -> bool:
+        """
+        按模式决定是否保存页面，需要保存时放入后台写盘队列。
+        :param name: 文件名中的描述部分，如 bing_www_search_关键字
+        :param content: 页面内容
+        :param error: 本次请求是否失败，失败时 sampled 与 on_error 模式都会保存
+        :return: 是否已放入写盘队列
+        """
+        if not content or not self.should_dump(error):
+            return False
+        filename = f"{time.strftime('%Y%m%d-%H%M%S')}_{'error' if error else 'sample'}_{_UNSAFE_CHARS.sub('_', name)[:60]}.html"
+        try:
+            self._queue.put_nowait((filename, content))
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+            return False
+        self._ensure_writer()
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "seen": self._seen,
+                "dumped": self._dumped,
+                "dropped": self._dropped,
+                "pending": self._queue.qsize(),
+            }
+
+    def _ensure_writer(self) -> None:
+        with self._lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._write_loop, name="diagnostics-writer", daemon=True)
+                self._writer.start()
+
+    def _write_loop(self) -> None:
+        while True:
+            filename, content = self._queue.get()
+            try:
+                os.makedirs(self.dump_dir, exist_ok=True)
+                with open(os.path.join(self.dump_dir, filename), "w", encoding="utf-8") as f:
+                    f.write(content)
+                with self._lock:
+                    self._dumped += 1
+                self._rotate()
+            except OSError as e:
+                print(f"诊断转储写盘失败: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _rotate(self) -> None:
+        """文件数或总大小超出上限时删除最旧的转储"""
+        entries = []
+        for entry in os.scandir(self.dump_dir):
+            if entry.is_file() and entry.name.endswith(".html"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        while entries and (len(entries) > self.max_files or total > self.max_bytes):
+            _, size, path = entries.pop(0)
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+
+_dumper: Optional[DiagnosticsDumper] = None
+_dumper_lock = threading.Lock()
+
+
+def get_diagnostics() -> DiagnosticsDumper:
+    """获取进程内共享的诊断转储器，按 config.toml 的 [diagnostics] 节创建"""
+    global _dumper
+    if _dumper is not None:
+        return _dumper
+    with _dumper_lock:
+        if _dumper is not None:
+            return _dumper
+        diag_cfg = load_plugin_config('diagnostics')
+        _dumper = DiagnosticsDumper(
+            mode=diag_cfg.get('mode', DEFAULT_MODE),
+            sample_rate=diag_cfg.get('sample_rate', DEFAULT_SAMPLE_RATE),
+            dump_dir=diag_cfg.get('dump_dir') or DEFAULT_DUMP_DIR,
+            max_files=diag_cfg.get('max_files', DEFAULT_MAX_FILES),
+            max_bytes=int(diag_cfg.get('max_mb', DEFAULT_MAX_BYTES // (1024 * 1024))) * 1024 * 1024,
+        )
+        return _dumper
@@ -0,0 +1,279 @@
+"""
+豆包异步客户端
+
+基于 AsyncOpenAI 的非阻塞调用封装：
+- 不阻塞事件循环：一次联网搜索等待期间，其他聊天照常处理
+- 连接复用：按 (base_url, api_key) 共享客户端与长连接池，可用时启用 HTTP/2
+- 并发上限：同一进程内所有 Action 实例共享同一个信号量
+- 超时控制：单次请求超过设定时间直接取消
+- 速率限制：全局令牌桶加按模型的 rpm/tpm 限流，令牌不足时按优先级排队，队列满时直接拒绝
+- 调用指标：按模型记录 token 用量、首 token 延迟与总耗时
+- 流式输出：按句子边界切分，生成一句发一句
+"""
+
+import asyncio
+import atexit
+import importlib.util
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+from .rate_limiter import (
+    get_rate_limiter,
+    get_model_rate_limiter,
+    PriorityRateLimiter,
+    PRIORITY_NORMAL,
+    DEFAULT_RATE,
+    DEFAULT_BURST,
+    DEFAULT_MAX_QUEUE,
+)
+from .llm_metrics import get_llm_metrics
+
+DEFAULT_BASE_URL = "https://ark.cn-beijing.volces.com/api/v3/bots"
+DEFAULT_TIMEOUT = 60.0  # 单次请求超时（秒）
+DEFAULT_MAX_CONCURRENCY = 8  # 同时进行中的豆包请求上限
+DEFAULT_MIN_SEGMENT_CHARS = 20  # 流式切分时每段的最少字符数，避免刷屏式的碎句
+DEFAULT_MAX_CONNECTIONS = 32  # 每个客户端连接池的最大连接数
+DEFAULT_KEEPALIVE_EXPIRY = 60.0  # 空闲长连接保留时间（秒）
+
+# 安装了 h2 时启用 HTTP/2，多个请求复用同一条连接
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# 句子结束符：中英文句号、问号、感叹号、分号与换行
+SENTENCE_ENDINGS = "。！？!?；;\n"
+
+# 按并发上限共享的信号量，保证多个Action实例之间的限制生效
+_semaphores: Dict[int, asyncio.Semaphore] = {}
+# 按 (base_url, api_key) 共享的客户端，避免每个Action实例重新建立 TCP/TLS 连接
+_clients: Dict[Tuple[str, str], AsyncOpenAI] = {}
+
+
+def resolve_base_url(base_url: str, model: str) -> str:
+    """
+    根据配置的 api.base_url 得到实际请求地址。
+    豆包应用（bot-开头的端点ID）走 /bots 接口，配置中未带 /bots 时自动补上。
+    """
+    base_url = (base_url or DEFAULT_BASE_URL).rstrip("/")
+    if model.startswith("bot-") and not base_url.endswith("/bots"):
+        base_url += "/bots"
+    return base_url
+
+
+def get_openai_client(base_url: str, api_key: str, timeout: float = DEFAULT_TIMEOUT) -> AsyncOpenAI:
+    """获取共享的 AsyncOpenAI 客户端，同一组凭据复用同一个长连接池"""
+    key = (base_url, api_key)
+    client = _clients.get(key)
+    if client is None or client.is_closed():
+        http_client = DefaultAsyncHttpxClient(
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(
+                max_connections=DEFAULT_MAX_CONNECTIONS,
+                max_keepalive_connections=DEFAULT_MAX_CONNECTIONS,
+                keepalive_expiry=DEFAULT_KEEPALIVE_EXPIRY,
+            ),
+        )
+        client = AsyncOpenAI(base_url=base_url, api_key=api_key, timeout=timeout, http_client=http_client)
+        _clients[key] = client
+    return client
+
+
+async def close_clients(quiet: bool = False) -> None:
+    """
+    关闭所有共享客户端及其连接池，插件卸载时调用。
+    :param quiet: 为 True 时不输出关闭失败的信息（进程退出时使用）
+    """
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        try:
+            await client.close()
+        except Exception as e:
+            if not quiet:
+                print(f"关闭豆包客户端失败: {e}")
+
+
+@atexit.register
+def _close_clients_at_exit() -> None:
+    """进程退出时兜底关闭仍未关闭的连接池"""
+    if _clients:
+        try:
+            asyncio.run(close_clients(quiet=True))
+        except Exception:
+            pass
+
+
+def get_semaphore(max_concurrency: int) -> asyncio.Semaphore:
+    """获取指定并发上限的共享信号量"""
+    max_concurrency = max(1, int(max_concurrency))
+    semaphore = _semaphores.get(max_concurrency)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(max_concurrency)
+        _semaphores[max_concurrency] = semaphore
+    return semaphore
+
+
+class DoubaoClient:
+    """豆包异步客户端，带并发上限与超时控制"""
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = DEFAULT_BASE_URL,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        rate_limit: float = DEFAULT_RATE,
+        rate_burst: float = DEFAULT_BURST,
+        rate_max_queue: int = DEFAULT_MAX_QUEUE,
+        model_rate_limits: Optional[Dict[str, Dict[str, float]]] = None,
+    ):
+        """
+        :param rate_limit: 全局每秒请求数（令牌桶速率，0为不限）
+        :param rate_burst: 全局令牌桶容量
+        :param rate_max_queue: 每个限流器排队等待的调用上限
+        :param model_rate_limits: 按模型的限流配置，如 {"模型名": {"rpm": 60, "tpm": 100000}}
+        """
+        self.timeout = float(timeout)
+        self.client = get_openai_client(base_url, api_key, self.timeout)
+        self._semaphore = get_semaphore(max_concurrency)
+        self._rate_limiter = get_rate_limiter(rate_limit, rate_burst, rate_max_queue)
+        self._rate_max_queue = rate_max_queue
+        self._model_rate_limits = model_rate_limits or {}
+        self.metrics = get_llm_metrics()
+
+    def _model_limiter(self, model: str) -> Optional[PriorityRateLimiter]:
+        """该模型配置了 rpm 或 tpm 时返回共享的模型限流器，否则返回 None"""
+        limits = self._model_rate_limits.get(model)
+        if not limits:
+            return None
+        rpm = float(limits.get("rpm", 0) or 0)
+        tpm = float(limits.get("tpm", 0) or 0)
+        if rpm <= 0 and tpm <= 0:
+            return None
+        return get_model_rate_limiter(model, rpm, tpm, self._rate_max_queue)
+
+    async def _acquire(self, model: str, priority: int) -> Optional[PriorityRateLimiter]:
+        """先等模型限流器再等全局限流器，返回模型限流器用于事后扣除 token"""
+        model_limiter = self._model_limiter(model)
+        if model_limiter is not None:
+            await model_limiter.acquire(priority)
+        await self._rate_limiter.acquire(priority)
+        return model_limiter
+
+    async def chat(
+        self, model: str, messages: List[Dict[str, str]], priority: int = PRIORITY_NORMAL, **kwargs: Any
+    ) -> Any:
+        """
+        发送一次对话请求，返回完整的 completion 对象。
+        :param model: 模型名称或应用端点ID
+        :param messages: OpenAI 格式的消息列表
+        :param priority: 限流排队优先级，数值越小越优先
+        :raises: asyncio.TimeoutError 超过 timeout 仍未返回时抛出
+        :raises: asyncio.QueueFull 限流排队已满时抛出
+        """
+        model_limiter = await self._acquire(model, priority)
+        async with self._semaphore:
+            start = time.monotonic()
+            try:
+                completion = await asyncio.wait_for(
+                    self.client.chat.completions.create(model=model, messages=messages, **kwargs),
+                    timeout=self.timeout,
+                )
+            except Exception:
+                self.metrics.record(model, latency=time.monotonic() - start, success=False)
+                raise
+            usage = getattr(completion, "usage", None)
+            if model_limiter is not None:
+                model_limiter.charge(getattr(usage, "total_tokens", 0) or 0)
+            self.metrics.record(
+                model,
+                prompt_tokens=getattr(usage, "prompt_tokens", 0),
+                completion_tokens=getattr(usage, "completion_tokens", 0),
+                latency=time.monotonic() - start,
+            )
+            return completion
+
+    async def stream_chat(
+        self, model: str, messages: List[Dict[str, str]], priority: int = PRIORITY_NORMAL, **kwargs: Any
+    ) -> AsyncIterator[str]:
+        """
+        以 stream=True 发送对话请求，逐块产出增量文本。
+        整个流共享一个 timeout 截止时间，流结束前一直占用并发名额。
+        :param priority: 限流排队优先级，数值越小越优先
+        :raises: asyncio.TimeoutError 超过 timeout 仍未结束时抛出
+        :raises: asyncio.QueueFull 限流排队已满时抛出
+        """
+        model_limiter = await self._acquire(model, priority)
+        async with self._semaphore:
+            start = time.monotonic()
+            deadline = start + self.timeout
+            ttft = None
+            usage = None
+            success = False
+            # 让最后一个数据块携带本次调用的 token 用量
+            kwargs.setdefault("stream_options", {"include_usage": True})
+            try:
+                stream = await asyncio.wait_for(
+                    self.client.chat.completions.create(model=model, messages=messages, stream=True, **kwargs),
+                    timeout=self.timeout,
+                )
+                chunks = stream.__aiter__()
+                try:
+                    while True:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise asyncio.TimeoutError()
+                        try:
+                            chunk = await asyncio.wait_for(chunks.__anext__(), timeout=remaining)
+                        except StopAsyncIteration:
+                            break
+                        if getattr(chunk, "usage", None):
+                            usage = chunk.usage
+                        if not chunk.choices:
+                            continue
+                        delta = chunk.choices[0].delta.content
+                        if delta:
+                            if ttft is None:
+                                ttft = time.monotonic() - start
+                            yield delta
+                    success = True
+                finally:
+                    await stream.close()
+            finally:
+                if model_limiter is not None:
+                    model_limiter.charge(getattr(usage, "total_tokens", 0) or 0)
+                self.metrics.record(
+                    model,
+                    prompt_tokens=getattr(usage, "prompt_tokens", 0),
+                    completion_tokens=getattr(usage, "completion_tokens", 0),
+                    ttft=ttft,
+                    latency=time.monotonic() - start,
+                    success=success,
+                )
+
+
+async def iter_sentences(
+    deltas: AsyncIterator[str], min_chars: int = DEFAULT_MIN_SEGMENT_CHARS
+) -> AsyncIterator[str]:
+    """
+    把增量文本流按句子边界切分成段落。
+    缓冲区达到 min_chars 且遇到句子结束符时产出一段，流结束时产出剩余内容。
+    :param deltas: stream_chat 产出的增量文本
+    :param min_chars: 每段的最少字符数
+    """
+    buffer = ""
+    async for delta in deltas:
+        buffer += delta
+        if len(buffer) < min_chars:
+            continue
+        # 从后往前找最后一个句子结束符，一次切出尽可能完整的句子
+        cut = max(buffer.rfind(ch) for ch in SENTENCE_ENDINGS)
+        if cut < min_chars - 1:
+            continue
+        segment, buffer = buffer[: cut + 1].strip(), buffer[cut + 1:]
+        if segment:
+            yield segment
+    buffer = buffer.strip()
+    if buffer:
+        yield buffer
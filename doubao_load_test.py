@@ -0,0 +1,101 @@
+"""
+豆包客户端本地压测
+
+在本机启动一个模拟火山引擎 chat/completions 接口的服务（每次请求固定延迟），
+分别用阻塞式 OpenAI 客户端和 DoubaoClient 并发发起多次 doubao_llm_search 请求，
+对比总耗时，验证异步客户端下并发请求不再串行。
+
+用法（在插件目录的上一级执行）：
+    python -m doubao_search_plugin.doubao_load_test --requests 20 --delay 1.0
+"""
+
+import argparse
+import asyncio
+import time
+
+from aiohttp import web
+from openai import OpenAI
+
+from .doubao_client import DoubaoClient, close_clients
+
+
+def _make_app(delay: float) -> web.Application:
+    """模拟豆包接口：固定延迟后返回一个最小的 completion"""
+
+    async def chat_completions(request: web.Request) -> web.Response:
+        body = await request.json()
+        await asyncio.sleep(delay)
+        return web.json_response({
+            "id": "load-test",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "load-test"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "ok"},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        })
+
+    app = web.Application()
+    app.router.add_post("/api/v3/bots/chat/completions", chat_completions)
+    return app
+
+
+async def _run_blocking(base_url: str, count: int) -> float:
+    """旧实现：在协程里调用同步客户端，请求会被事件循环串行化"""
+    client = OpenAI(base_url=base_url, api_key="load-test")
+
+    async def one():
+        client.chat.completions.create(model="load-test", messages=[{"role": "user", "content": "q"}])
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(count)))
+    return time.perf_counter() - start
+
+
+async def _run_async(base_url: str, count: int, concurrency: int, rate: float) -> float:
+    """新实现：DoubaoClient 非阻塞调用"""
+    client = DoubaoClient(
+        api_key="load-test", base_url=base_url, max_concurrency=concurrency, rate_limit=rate, rate_burst=count
+    )
+
+    async def one():
+        await client.chat(model="load-test", messages=[{"role": "user", "content": "q"}])
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(count)))
+    return time.perf_counter() - start
+
+
+async def main(count: int, delay: float, concurrency: int, rate: float, skip_blocking: bool):
+    runner = web.AppRunner(_make_app(delay))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}/api/v3/bots"
+    try:
+        print(f"模拟接口延迟 {delay:.2f}s，并发请求数 {count}，并发上限 {concurrency}")
+        # 阻塞式对照组放在独立线程的事件循环里跑，否则它会连同模拟服务一起卡死
+        if not skip_blocking:
+            blocking = await asyncio.to_thread(asyncio.run, _run_blocking(base_url, count))
+            print(f"阻塞式 OpenAI 客户端: {blocking:.2f}s（理论串行耗时 {count * delay:.2f}s）")
+        elapsed = await _run_async(base_url, count, concurrency, rate)
+        ideal = delay * -(-count // concurrency)
+        print(f"DoubaoClient 异步客户端: {elapsed:.2f}s（理论最短耗时 {ideal:.2f}s）")
+    finally:
+        await close_clients()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="豆包客户端本地并发压测")
+    parser.add_argument("--requests", type=int, default=20, help="并发请求数")
+    parser.add_argument("--delay", type=float, default=1.0, help="模拟接口每次请求的延迟（秒）")
+    parser.add_argument("--concurrency", type=int, default=8, help="DoubaoClient 并发上限")
+    parser.add_argument("--rate", type=float, default=0, help="DoubaoClient 令牌桶速率（每秒请求数，0为不限）")
+    parser.add_argument("--skip-blocking", action="store_true", help="跳过阻塞式客户端对照组")
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.delay, args.concurrency, args.rate, args.skip_blocking))
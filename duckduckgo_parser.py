@@ -0,0 +1,127 @@
+"""
+DuckDuckGo 静态结果页解析
+
+解析 html.duckduckgo.com/html/ 返回的无 JavaScript 结果页：
+- 使用 lxml 与预编译的 XPath 直接定位 div.result 结果项，跳过广告
+- lxml 不可用或解析失败时退回 BeautifulSoup
+- 结果链接是 duckduckgo.com/l/?uddg= 跳转时，直接从 uddg 参数取出真实地址，规范化后去重
+- 结果项字段与浏览器路径一致：type、title、url、source、full_url、snippet
+"""
+
+from typing import Dict, List, Optional, Set
+from urllib.parse import parse_qsl, urlsplit
+
+from bs4 import BeautifulSoup
+
+from .bing_parser import LXML_AVAILABLE, canonicalize_url
+
+if LXML_AVAILABLE:
+    from lxml import etree
+    from lxml import html as lxml_html
+
+    # 按 class 单词匹配，等价于 CSS 选择器 div.result:not(.result--ad) / a.result__a 等
+    _RESULT_ITEMS = etree.XPath(
+        '//div[contains(concat(" ", normalize-space(@class), " "), " result ")'
+        ' and not(contains(concat(" ", normalize-space(@class), " "), " result--ad "))]'
+    )
+    _TITLE_LINK = etree.XPath('(.//a[contains(concat(" ", normalize-space(@class), " "), " result__a ")])[1]')
+    _SNIPPET = etree.XPath('(.//*[contains(concat(" ", normalize-space(@class), " "), " result__snippet ")])[1]')
+    _DISPLAY_URL = etree.XPath('(.//*[contains(concat(" ", normalize-space(@class), " "), " result__url ")])[1]')
+
+# 被判定为机器人时返回的验证页特征
+_CHALLENGE_MARKERS = ("anomaly-modal", "challenge-form")
+
+
+def is_challenge_page(text: str) -> bool:
+    """页面是否为 DuckDuckGo 的机器人验证页"""
+    return any(marker in text for marker in _CHALLENGE_MARKERS)
+
+
+def decode_duckduckgo_redirect(href: str) -> str:
+    """
+    从 duckduckgo.com/l/?uddg= 跳转链接中取出真实地址，不发任何请求。
+    :return: 真实地址；不是跳转链接时原样返回
+    """
+    if not href or "uddg=" not in href:
+        return href
+    target = dict(parse_qsl(urlsplit(href).query)).get("uddg", "")
+    return target if target.startswith(("http://", "https://")) else href
+
+
+def _add_result(results: List[Dict], seen: Set[str], title: str, href: str, snippet: str, display_url: str) -> None:
+    url = canonicalize_url(decode_duckduckgo_redirect(href))
+    if not title or not url or url in seen:
+        return
+    seen.add(url)
+    results.append({
+        "type": "organic",
+        "title": title,
+        "url": url,
+        "source": urlsplit(url).netloc,
+        "full_url": display_url,
+        "snippet": snippet,
+    })
+
+
+def _parse_with_lxml(text: str, max_results: Optional[int]) -> List[Dict]:
+    root = lxml_html.document_fromstring(text)
+    results = []
+    seen = set()
+    for item in _RESULT_ITEMS(root):
+        links = _TITLE_LINK(item)
+        if not links:
+            continue
+        snippets = _SNIPPET(item)
+        display_urls = _DISPLAY_URL(item)
+        _add_result(
+            results,
+            seen,
+            links[0].text_content().strip(),
+            links[0].get("href"),
+            snippets[0].text_content().strip() if snippets else "",
+            display_urls[0].text_content().strip() if display_urls else "",
+        )
+        if max_results is not None and len(results) >= max_results:
+            break
+    return results
+
+
+def _parse_with_bs4(text: str, max_results: Optional[int]) -> List[Dict]:
+    soup = BeautifulSoup(text, "lxml" if LXML_AVAILABLE else "html.parser")
+    results = []
+    seen = set()
+    for item in soup.select("div.result:not(.result--ad)"):
+        link = item.select_one("a.result__a")
+        if link is None:
+            continue
+        snippet = item.select_one(".result__snippet")
+        display_url = item.select_one(".result__url")
+        _add_result(
+            results,
+            seen,
+            link.text.strip(),
+            link.get("href", ""),
+            snippet.text.strip() if snippet else "",
+            display_url.text.strip() if display_url else "",
+        )
+        if max_results is not None and len(results) >= max_results:
+            break
+    return results
+
+
+def parse_duckduckgo_html(text: str, max_results: Optional[int] = None, use_lxml: bool = True) -> List[Dict]:
+    """
+    解析 DuckDuckGo 静态结果页中的自然结果。
+    :param text: 页面 HTML
+    :param max_results: 最多返回的结果数，None 表示不限
+    :param use_lxml: 是否使用 lxml 快速路径，False 时直接使用 BeautifulSoup
+    :return: 结果列表，没有结果或是验证页时为空
+    """
+    if not text:
+        return []
+    if use_lxml and LXML_AVAILABLE:
+        try:
+            return _parse_with_lxml(text, max_results)
+        except (etree.ParserError, ValueError) as e:
+            print(f"lxml解析DuckDuckGo页面失败，改用BeautifulSoup: {e}")
+    return _parse_with_bs4(text, max_results)
@@ -1,15 +1,11 @@
+import asyncio
+import queue
+import threading
 import traceback
-from typing import Dict, Any, Tuple
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
+from typing import Dict, Any, Optional
+from urllib.parse import quote
 import time
 import os
-import json
-from datetime import datetime, timedelta
-import hashlib
 import toml
     
 # 读取代理配置
@@ -31,90 +27,222 @@ except Exception as e:
     print(f"代理配置读取失败: {e}")
 
 from src.common.logger import get_logger
+from .http_client import fetch_url, run_sync
+from .chrome_pool import get_browser_executor, get_chrome_pool, wait_for_any
+from .circuit_breaker import get_breaker, host_of
+from .diagnostics import get_diagnostics, is_debug_enabled
+from .duckduckgo_parser import is_challenge_page, parse_duckduckgo_html
+from .result_cache import normalize_query
+from .result_store import get_result_store
 
 logger = get_logger("duckduckgo_tool")
 
-# 自定义用户数据目录
-USER_DATA_DIR = os.path.join(os.path.expanduser("~"), "chrome_profile_duckduckgo")
-# 缓存目录
-CACHE_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "..", "cache", "duckduckgo")
-os.makedirs(CACHE_DIR, exist_ok=True)
-
-def _get_cache_path(query: str) -> str:
-    """获取查询结果的缓存路径"""
-    query_hash = hashlib.md5(query.encode('utf-8')).hexdigest()
-    return os.path.join(CACHE_DIR, f"{query_hash}.json")
-
-def _is_cache_valid(cache_path: str) -> bool:
-    """检查缓存是否有效（12小时内）"""
-    if not os.path.exists(cache_path):
-        return False
-        
-    cache_time = datetime.fromtimestamp(os.path.getmtime(cache_path))
-    return datetime.now() - cache_time < timedelta(hours=12)
+# 搜索结果缓存时间（12小时），结果存入共享的持久化结果存储
+CACHE_TTL = 12 * 60 * 60
+# 熔断器使用的站点名
+DUCKDUCKGO_HOST = "duckduckgo.com"
+# 返回的结果条数
+MAX_RESULTS = 4
 
-def duckduckgo_search(query: str) -> Dict[str, Any]:
-    """使用Selenium执行DuckDuckGo搜索"""
+# 无需 JavaScript 的静态结果页，先走纯 HTTP 快速路径，没有结果时才启动浏览器
+HTML_SEARCH_URL = "https://html.duckduckgo.com/html/?q="
+HTML_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+                  "Chrome/124.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
+    "Referer": "https://html.duckduckgo.com/",
+}
+PATH_HTML = "html"
+PATH_BROWSER = "browser"
+
+# 浏览器结果页的就绪选择器，第一个是当前布局的标准结果项，其余为旧布局或兜底
+READY_SELECTORS = [
+    "article[data-testid='result']",
+    ".result",
+    ".web-result",
+    "[data-testid='result-extras-url']",
+]
+# 就绪检测的总等待时长（秒）
+READY_TIMEOUT = 8.0
+
+# 每条路径的尝试次数、有结果次数与累计耗时
+_path_stats = {path: {"attempts": 0, "hits": 0, "total_ms": 0.0} for path in (PATH_HTML, PATH_BROWSER)}
+_path_stats_lock = threading.Lock()
+# 就绪检测命中的选择器计数，None 表示超时未命中任何选择器
+_ready_counts: Dict[Optional[str], int] = {}
+
+
+def _record_path(path: str, hit: bool, started: float) -> None:
+    with _path_stats_lock:
+        stats = _path_stats[path]
+        stats["attempts"] += 1
+        stats["hits"] += int(hit)
+        stats["total_ms"] += (time.perf_counter() - started) * 1000
+
+
+def _record_ready(selector: Optional[str]) -> None:
+    with _path_stats_lock:
+        _ready_counts[selector] = _ready_counts.get(selector, 0) + 1
+
+
+def readiness_stats() -> Dict[str, Any]:
+    """
+    返回浏览器结果页就绪检测的统计，用于衡量页面布局漂移。
+    :return: matched 为各选择器命中次数（none 表示超时），drift_rate 为未命中标准选择器的比例
+    """
+    with _path_stats_lock:
+        counts = dict(_ready_counts)
+    total = sum(counts.values())
+    primary = counts.get(READY_SELECTORS[0], 0)
+    return {
+        "total": total,
+        "matched": {selector or "none": count for selector, count in counts.items()},
+        "drift_rate": round((total - primary) / total, 3) if total else 0.0,
+    }
+
+
+def search_path_stats() -> Dict[str, Dict[str, float]]:
+    """返回 HTML 快速路径与浏览器路径的尝试次数、命中率与平均耗时"""
+    with _path_stats_lock:
+        return {
+            path: {
+                "attempts": stats["attempts"],
+                "hits": stats["hits"],
+                "hit_rate": round(stats["hits"] / stats["attempts"], 3) if stats["attempts"] else 0.0,
+                "avg_ms": round(stats["total_ms"] / stats["attempts"], 1) if stats["attempts"] else 0.0,
+            }
+            for path, stats in _path_stats.items()
+        }
+
+
+async def duckduckgo_html_search(query: str) -> Dict[str, Any]:
+    """
+    纯 HTTP 快速路径：在共享的 aiohttp 会话上请求静态结果页并用预编译选择器解析，不启动浏览器。
+    :return: 与浏览器路径相同格式的结果，没有结果、被拦截或请求失败时 results 为空列表
+    """
+    url = HTML_SEARCH_URL + quote(query)
+    breaker = get_breaker(host_of(url))
+    if not breaker.allow():
+        logger.debug(f"DuckDuckGo HTML 快速路径熔断中，约 {breaker.retry_after():.0f} 秒后重试")
+        return {"success": False, "results": []}
+    started = time.perf_counter()
+    results = []
     try:
-        cache_path = _get_cache_path(query)
-        
-        # 检查缓存
-        if os.path.exists(cache_path) and _is_cache_valid(cache_path):
+        page = await fetch_url(url, HTML_HEADERS, None)
+        if page is None:
+            breaker.record_failure()
+        else:
+            status_code, _, text, _ = page
+            # 202 与验证页都表示被判定为机器人
+            if status_code != 200 or is_challenge_page(text):
+                logger.warning(f"DuckDuckGo HTML 快速路径被拦截，状态码: {status_code}")
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+                results = parse_duckduckgo_html(text, MAX_RESULTS)
+    except Exception as e:
+        logger.warning(f"DuckDuckGo HTML 快速路径出错: {e}")
+        breaker.record_failure()
+    finally:
+        _record_path(PATH_HTML, bool(results), started)
+    return {
+        "success": bool(results),
+        "results": results,
+        "debug_info": {"path": PATH_HTML, "result_count": len(results)},
+    }
+
+
+async def duckduckgo_search_async(query: str) -> Dict[str, Any]:
+    """
+    DuckDuckGo 搜索：先查结果存储，再走 HTML 快速路径，快速路径没有结果时才改用浏览器。
+    :return: {"success": 是否成功, "results": 结果列表或失败原因}
+    """
+    store = get_result_store()
+    store_key = normalize_query(query)
+    if store:
+        cached = await asyncio.to_thread(store.get, "duckduckgo", store_key)
+        if cached is not None:
             logger.info(f"Using cached results for query: {query}")
-            with open(cache_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        
-        # 配置Chrome选项 - 启用headless并模拟普通用户
-        chrome_options = Options()
-        chrome_options.add_argument(f"user-data-dir={USER_DATA_DIR}")
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--window-size=1920,1080")
-        chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
-        
-        # 初始化WebDriver
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=chrome_options)
+            return cached
+
+    result_data = await duckduckgo_html_search(query)
+    if not result_data["results"]:
+        logger.info(f"DuckDuckGo HTML 快速路径没有结果，改用浏览器搜索: {query}")
+        # 浏览器操作在有界的专用线程池中执行；本协程被取消时，排队中的任务直接移除，执行中的任务尽早结束
+        executor = get_browser_executor()
+        try:
+            result_data = await executor.run(duckduckgo_browser_search, query)
+        except queue.Full as e:
+            logger.warning(f"DuckDuckGo 浏览器搜索排队已满: {executor.stats()}")
+            return {"success": False, "results": f"搜索请求过多，请稍后再试（{e}）"}
+    if is_debug_enabled(logger):
+        logger.debug(f"DuckDuckGo 搜索路径统计: {search_path_stats()}，就绪检测统计: {readiness_stats()}")
+
+    if store and result_data.get("success") and result_data.get("results"):
+        await asyncio.to_thread(store.set, "duckduckgo", store_key, result_data, CACHE_TTL)
+    return result_data
+
+
+def duckduckgo_search(query: str) -> Dict[str, Any]:
+    """duckduckgo_search_async 的同步接口，在共享的后台事件循环中执行"""
+    return run_sync(duckduckgo_search_async(query))
+
+
+def _cancelled(cancel_event: Optional[threading.Event]) -> bool:
+    return cancel_event is not None and cancel_event.is_set()
+
+
+def duckduckgo_browser_search(query: str, cancel_event: Optional[threading.Event] = None) -> Dict[str, Any]:
+    """
+    使用Selenium执行DuckDuckGo搜索，浏览器从常驻的 Chrome 池中借出，用完归还。
+    :param cancel_event: 取消事件，置位后在下一个检查点放弃本次搜索
+    """
+    started = time.perf_counter()
+    results = []
+    cancelled_result = {"success": False, "results": "搜索已取消"}
+    try:
+        if _cancelled(cancel_event):
+            return cancelled_result
+        # 站点熔断中时直接返回，不再启动浏览器
+        breaker = get_breaker(DUCKDUCKGO_HOST)
+        if not breaker.allow():
+            return {
+                "success": False,
+                "results": f"DuckDuckGo 暂时不可用，约 {breaker.retry_after():.0f} 秒后重试"
+            }
         
+        # 从常驻池中借出浏览器（headless，每个浏览器使用独立的用户数据目录），用完归还并复用标签页
+        pool = get_chrome_pool()
+        worker = pool.acquire()
+        driver = worker.driver
+        failed = False
+
         try:
+            # 等待浏览器期间调用方可能已放弃
+            if _cancelled(cancel_event):
+                return cancelled_result
             # 执行搜索 - 使用显式等待
             driver.get(f"https://duckduckgo.com/?t=h_&q={query}")
             
-            # 智能等待搜索结果 - 检查多个可能的选择器
-            from selenium.webdriver.support.ui import WebDriverWait
-            from selenium.webdriver.support import expected_conditions as EC
-            selectors = [
-                "article[data-testid='result']",
-                ".result",
-                ".web-result",
-                "[data-testid='result-extras-url']"
-            ]
-            
-            for selector in selectors:
-                try:
-                    WebDriverWait(driver, 5).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, selector))
-                    )
-                    logger.info(f"使用选择器 '{selector}' 找到搜索结果")
-                    break
-                except:
-                    continue
+            # 等待任一结果选择器出现：一个轮询循环、一个截止时间，记录命中的选择器用于统计布局漂移
+            selector = wait_for_any(driver, READY_SELECTORS, READY_TIMEOUT, cancel_event=cancel_event)
+            if _cancelled(cancel_event):
+                return cancelled_result
+            _record_ready(selector)
+            if selector:
+                logger.info(f"使用选择器 '{selector}' 找到搜索结果")
             else:
-                logger.warning("未能检测到标准搜索结果元素")
-            
-            # 保存页面HTML用于调试
-            debug_html_path = os.path.join(CACHE_DIR, "debug_last_page.html")
-            with open(debug_html_path, 'w', encoding='utf-8') as f:
-                f.write(driver.page_source)
+                logger.warning(f"未能检测到标准搜索结果元素，就绪检测统计: {readiness_stats()}")
             
-            # 解析结果
+            # 解析结果；page_source 每次读取都要与浏览器往返一次，只读一次
+            page_source = driver.page_source
             from bs4 import BeautifulSoup
-            soup = BeautifulSoup(driver.page_source, 'html.parser')
+            soup = BeautifulSoup(page_source, 'html.parser')
             
             # 调试：打印页面关键元素
             logger.info("页面标题: %s", driver.title)
-            logger.info("页面源代码长度: %d 字符", len(driver.page_source))
+            logger.info("页面源代码长度: %d 字符", len(page_source))
             logger.info("搜索结果容器数量: %d", len(soup.find_all('article')))
             results = []
             
@@ -173,32 +301,38 @@ def duckduckgo_search(query: str) -> Dict[str, Any]:
             # 保存结果
             result_data = {
                 "success": True,
-                "results": results[:4],
+                "results": results[:MAX_RESULTS],
                 "debug_info": {
+                    "path": PATH_BROWSER,
                     "page_title": driver.title,
                     "result_count": len(results),
-                    "html_saved_to": debug_html_path
                 }
             }
             
-            with open(cache_path, 'w', encoding='utf-8') as f:
-                json.dump(result_data, f)
-                
+            # 页面交给诊断转储器按模式抽样保存，后台线程写盘，文件名带时间戳，并发搜索互不覆盖
+            get_diagnostics().dump(f"duckduckgo_browser_{query[:30]}", page_source, error=not results)
+            
+            # 页面没有任何结果容器时通常是被拦截（验证页），计为站点失败
+            if results:
+                breaker.record_success()
+            else:
+                breaker.record_failure()
+
             logger.info(f"成功获取 {len(results)} 条结果")
             return result_data
             
         except Exception as e:
             logger.error(f"搜索过程中发生错误: {str(e)}")
+            breaker.record_failure()
+            failed = True
             import traceback
             traceback.print_exc()
             raise
         finally:
-            try:
-                if driver:
-                    driver.quit()
-                    logger.info("浏览器已关闭")
-            except Exception as e:
-                logger.error(f"关闭浏览器时出错: {str(e)}")
+            # 归还浏览器：出错且浏览器失效、查询次数或内存超限时由池回收重建
+            pool.release(worker, failed)
+            if is_debug_enabled(logger):
+                logger.debug(f"Chrome 池统计: {pool.stats()}")
             
     except Exception as e:
         logger.error(f"DuckDuckGo搜索出错: {traceback.format_exc()}")
@@ -206,3 +340,5 @@ def duckduckgo_search(query: str) -> Dict[str, Any]:
             "success": False,
             "results": f"搜索过程中出错: {str(e)}"
         }
+    finally:
+        _record_path(PATH_BROWSER, bool(results), started)
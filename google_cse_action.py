@@ -5,6 +5,8 @@ from pathlib import Path
 
 from src.chat.focus_chat.planners.actions.plugin_action import PluginAction, register_action
 from src.common.logger_manager import get_logger
+from .result_cache import normalize_query
+from .result_store import get_result_store
 
 logger = get_logger("google_cse_action")
 
@@ -72,6 +74,13 @@ class GoogleCSESearchAction(PluginAction):
     def _perform_search(self, query: str, num_results: int, language: str) -> Dict[str, Any]:
         """执行实际的搜索"""
         try:
+            store = get_result_store()
+            store_key = f"{num_results}|{language}|{normalize_query(query)}"
+            if store:
+                cached = store.get("google_cse", store_key)
+                if cached is not None:
+                    return cached
+
             params = {
                 'key': self.api_key,
                 'cx': self.engine_id,
@@ -94,10 +103,13 @@ class GoogleCSESearchAction(PluginAction):
                         'snippet': item.get('snippet', '')
                     })
             
-            return {
+            result_data = {
                 "success": True,
                 "results": results
             }
+            if store and results:
+                store.set("google_cse", store_key, result_data)
+            return result_data
             
         except Exception as e:
             logger.error(f"{self.log_prefix} 搜索错误: {str(e)}")
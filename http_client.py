@@ -0,0 +1,119 @@
+"""
+共享 HTTP 抓取
+
+必应引擎与 DuckDuckGo 的 HTML 快速路径共用的 aiohttp 抓取工具：
+- 每个事件循环一个长期复用的会话，按站点限制并发连接数，复用长连接
+- 读取 config.toml 的 [proxy] 节，配置了代理时所有请求都经过代理
+- 超时后用更宽松的超时重试一次；只有调用方明确允许时才在重试中跳过证书校验
+- 可选流式读取：边下载边交给解析器，凑够结果后不再读取剩余内容
+- 同步调用方通过共享的后台事件循环执行协程
+"""
+
+import asyncio
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import aiohttp
+
+from src.common.logger import get_logger
+
+from .config_loader import load_plugin_config
+
+logger = get_logger("http_client")
+
+# 连接池配置：每个站点的最大并发连接数、空闲长连接保留时间（秒）
+PER_HOST_LIMIT = 8
+KEEPALIVE_TIMEOUT = 30
+
+DEFAULT_CHUNK_SIZE = 16 * 1024  # 流式读取响应的默认块大小
+
+# 读取代理配置，config.toml 的[proxy]节启用代理时所有请求都经过代理
+_proxy_cfg = load_plugin_config('proxy')
+PROXY_URL = _proxy_cfg['proxy_url'] if _proxy_cfg.get('use_proxy', False) and _proxy_cfg.get('proxy_url', '') else None
+
+# 每个事件循环一个长期复用的 aiohttp 会话（会话不能跨事件循环使用）
+_sessions: Dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+# 同步调用方共用的后台事件循环
+_sync_loop: Optional[asyncio.AbstractEventLoop] = None
+_sync_loop_lock = threading.Lock()
+
+
+def _get_session() -> aiohttp.ClientSession:
+    """获取当前事件循环上共享的会话，不存在时创建"""
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(
+            limit_per_host=PER_HOST_LIMIT, keepalive_timeout=KEEPALIVE_TIMEOUT, ttl_dns_cache=300
+        )
+        # 不保存响应Cookie，避免国际版与中国版必应之间的Cookie污染；每次请求显式携带固定Cookie
+        session = aiohttp.ClientSession(connector=connector, cookie_jar=aiohttp.DummyCookieJar(), trust_env=True)
+        _sessions[loop] = session
+    return session
+
+
+async def fetch_url(
+    url: str,
+    headers: Optional[Dict[str, str]],
+    cookies: Optional[Dict[str, str]],
+    make_parser: Optional[Callable[[], Any]] = None,
+    insecure_retry: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Optional[Tuple[int, str, str, Any]]:
+    """
+    在共享会话上抓取页面，超时后用更宽松的超时重试一次。
+    :param make_parser: 创建流式解析器的函数，解析器需提供 feed(chunk) -> 是否已凑够结果 与 text 属性；
+        传入时边读取边解析，凑够结果后不再读取剩余内容并关闭连接
+    :param insecure_retry: 重试时是否跳过 SSL 证书校验，默认始终校验
+    :param chunk_size: 流式读取的块大小
+    :return: (状态码, 最终url, 页面文本, 流式解析器)，页面文本在提前结束时不完整；两次都失败时返回 None
+    """
+    session = _get_session()
+    # 第一次：连接超时3.05秒、读取超时6秒；第二次：放宽超时
+    attempts = [
+        (aiohttp.ClientTimeout(sock_connect=3.05, sock_read=6), None),
+        (aiohttp.ClientTimeout(sock_connect=5, sock_read=10), False if insecure_retry else None),
+    ]
+    for attempt, (timeout, ssl) in enumerate(attempts):
+        try:
+            async with session.get(
+                url, headers=headers, cookies=cookies, timeout=timeout, ssl=ssl, proxy=PROXY_URL
+            ) as res:
+                if make_parser is None or res.status != 200:
+                    text = await res.text(encoding="utf-8", errors="replace")
+                    return res.status, str(res.url), text, None
+                # 每次尝试使用新的解析器，避免重试时混入上一次读到一半的内容
+                parser = make_parser()
+                async for chunk in res.content.iter_chunked(chunk_size):
+                    if parser.feed(chunk):
+                        # 已凑够结果，剩余内容不再读取，直接关闭连接而不是放回连接池
+                        res.close()
+                        break
+                return res.status, str(res.url), parser.text, parser
+        except (asyncio.TimeoutError, aiohttp.ClientError) as e:
+            if attempt == 0:
+                logger.warning(f"第一次请求超时，正在重试: {str(e)}")
+            else:
+                logger.error(f"第二次请求也失败: {str(e)}")
+    return None
+
+
+def run_sync(coro):
+    """在共享的后台事件循环中执行协程并等待结果，供同步调用方使用"""
+    global _sync_loop
+    with _sync_loop_lock:
+        if _sync_loop is None:
+            _sync_loop = asyncio.new_event_loop()
+            threading.Thread(target=_sync_loop.run_forever, name="http-client-loop", daemon=True).start()
+    return asyncio.run_coroutine_threadsafe(coro, _sync_loop).result()
+
+
+async def close_sessions():
+    """关闭当前事件循环与后台事件循环上的共享会话"""
+    loop = asyncio.get_running_loop()
+    for session_loop, session in list(_sessions.items()):
+        if session_loop is loop:
+            await session.close()
+        elif session_loop is _sync_loop and not session_loop.is_closed():
+            await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(session.close(), session_loop))
+        del _sessions[session_loop]
@@ -0,0 +1,204 @@
+"""
+LLM 调用指标
+
+按模型记录每次豆包调用的 token 用量与耗时：
+- 输入/输出 token 数、首 token 延迟（TTFT）、总耗时
+- 内存中保留最近 N 次调用，实时计算 p50/p95/p99
+- 按天汇总并写入本地 JSON 文件，重启后继续累计当天数据；
+  在事件循环中记录时由后台线程写盘，不阻塞调用方
+"""
+
+import asyncio
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_WINDOW = 1000  # 每个模型保留的最近调用数
+DEFAULT_FLUSH_INTERVAL = 60.0  # 日汇总写盘间隔（秒）
+DEFAULT_ROLLUP_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "..", "cache", "llm_metrics")
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """最近秩法计算百分位数，输入需已排序"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _summarize(values: Iterable[float]) -> Dict[str, float]:
+    ordered = sorted(values)
+    return {f"p{p}": round(percentile(ordered, p), 4) for p in PERCENTILES}
+
+
+class _ModelStats:
+    """单个模型的滚动窗口与当日累计"""
+
+    def __init__(self, window: int):
+        self.latency = deque(maxlen=window)
+        self.ttft = deque(maxlen=window)
+        self.requests = 0
+        self.errors = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.latency_sum = 0.0
+
+
+class LLMMetrics:
+    """按模型统计 LLM 调用指标，线程安全"""
+
+    def __init__(
+        self,
+        window: int = DEFAULT_WINDOW,
+        rollup_dir: Optional[str] = DEFAULT_ROLLUP_DIR,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+    ):
+        self.window = max(1, int(window))
+        self.rollup_dir = rollup_dir
+        self.flush_interval = float(flush_interval)
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # 串行化写盘，避免后台写盘与卸载时的写盘同时写同一个临时文件
+        self._flush_task: Optional[asyncio.Future] = None
+        # 跨天后尚未写盘的前一天汇总：(日期, 汇总)
+        self._pending: List[Tuple[str, Dict[str, Any]]] = []
+        self._models: Dict[str, _ModelStats] = {}
+        self._day = date.today().isoformat()
+        self._last_flush = time.monotonic()
+        # 当天已写盘的累计值，重启后在此基础上继续累加
+        self._persisted: Dict[str, Dict[str, Any]] = self._load_rollup(self._day)
+
+    def record(
+        self,
+        model: str,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        ttft: Optional[float] = None,
+        latency: float = 0.0,
+        success: bool = True,
+    ) -> None:
+        """
+        记录一次调用。
+        :param ttft: 首 token 延迟（秒），非流式调用等于总耗时
+        :param latency: 总耗时（秒）
+        """
+        with self._lock:
+            rolled = self._roll_day_locked()
+            stats = self._models.get(model)
+            if stats is None:
+                stats = _ModelStats(self.window)
+                self._models[model] = stats
+            stats.requests += 1
+            if not success:
+                stats.errors += 1
+            else:
+                stats.prompt_tokens += int(prompt_tokens or 0)
+                stats.completion_tokens += int(completion_tokens or 0)
+                stats.latency_sum += latency
+                stats.latency.append(latency)
+                stats.ttft.append(latency if ttft is None else ttft)
+            should_flush = rolled or time.monotonic() - self._last_flush >= self.flush_interval
+            if should_flush:
+                # 先更新时间，写盘完成前的其他记录不会重复触发
+                self._last_flush = time.monotonic()
+        if should_flush:
+            self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        """在事件循环中时交给后台线程写盘，否则直接写盘"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.ensure_future(asyncio.to_thread(self.flush))
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """返回各模型当天的累计值与滚动百分位，包括今天只在已写盘数据中出现的模型"""
+        with self._lock:
+            return self._rollup_locked()["models"]
+
+    def flush(self) -> None:
+        """把当天的汇总写入本地文件，会阻塞，在事件循环中请用 asyncio.to_thread 调用"""
+        with self._lock:
+            self._roll_day_locked()
+            rollups = self._pending + [(self._day, self._rollup_locked())]
+            self._pending = []
+            self._last_flush = time.monotonic()
+        for day, rollup in rollups:
+            self._write_rollup(day, rollup)
+
+    def _write_rollup(self, day: str, rollup: Dict[str, Any]) -> None:
+        if not self.rollup_dir:
+            return
+        try:
+            os.makedirs(self.rollup_dir, exist_ok=True)
+            path = os.path.join(self.rollup_dir, f"{day}.json")
+            tmp_path = path + ".tmp"
+            with self._write_lock:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(rollup, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"LLM指标写盘失败: {e}")
+
+    def _model_snapshot(self, model: str, stats: _ModelStats) -> Dict[str, Any]:
+        base = self._persisted.get(model, {})
+        requests = base.get("requests", 0) + stats.requests
+        latency_sum = base.get("latency_sum", 0.0) + stats.latency_sum
+        succeeded = requests - base.get("errors", 0) - stats.errors
+        return {
+            "requests": requests,
+            "errors": base.get("errors", 0) + stats.errors,
+            "prompt_tokens": base.get("prompt_tokens", 0) + stats.prompt_tokens,
+            "completion_tokens": base.get("completion_tokens", 0) + stats.completion_tokens,
+            "latency_sum": round(latency_sum, 4),
+            "latency_avg": round(latency_sum / succeeded, 4) if succeeded > 0 else 0.0,
+            "latency": _summarize(stats.latency),
+            "ttft": _summarize(stats.ttft),
+        }
+
+    def _rollup_locked(self) -> Dict[str, Any]:
+        models = {model: self._model_snapshot(model, stats) for model, stats in self._models.items()}
+        # 今天还没有新调用、但文件里已有的模型原样保留
+        for model, base in self._persisted.items():
+            models.setdefault(model, base)
+        return {"date": self._day, "models": models}
+
+    def _roll_day_locked(self) -> bool:
+        """跨天时把前一天的汇总留给下一次写盘，再清零，返回是否跨天"""
+        today = date.today().isoformat()
+        if today == self._day:
+            return False
+        self._pending.append((self._day, self._rollup_locked()))
+        self._day = today
+        self._models = {}
+        self._persisted = {}
+        return True
+
+    def _load_rollup(self, day: str) -> Dict[str, Dict[str, Any]]:
+        if not self.rollup_dir:
+            return {}
+        path = os.path.join(self.rollup_dir, f"{day}.json")
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f).get("models", {})
+        except (OSError, ValueError):
+            return {}
+
+
+_metrics: Optional[LLMMetrics] = None
+
+
+def get_llm_metrics() -> LLMMetrics:
+    """获取进程内共享的 LLM 指标实例"""
+    global _metrics
+    if _metrics is None:
+        _metrics = LLMMetrics()
+    return _metrics
@@ -52,7 +52,22 @@ import toml
 import io
 import os
 import re
-from openai import OpenAI
+from .doubao_client import (
+    DoubaoClient,
+    iter_sentences,
+    resolve_base_url,
+    close_clients,
+    DEFAULT_BASE_URL,
+    DEFAULT_TIMEOUT,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_MIN_SEGMENT_CHARS,
+)
+from .rate_limiter import DEFAULT_RATE, DEFAULT_BURST, DEFAULT_MAX_QUEUE, PRIORITY_HIGH
+from .llm_metrics import get_llm_metrics
+from .result_cache import LRUCache, normalize_query, DEFAULT_TTL, DEFAULT_MAX_BYTES
+from .single_flight import get_single_flight, get_stream_flight
+from .diagnostics import is_debug_enabled
+from .result_store import get_result_store
 
 
 
@@ -135,11 +150,10 @@ class DoubaoSearchGenerationAction(BaseAction):
     # 关联类型
     associated_types = ["image", "text"]
 
-    # 简单的请求缓存，避免短时间内重复请求
-    _request_cache = {}
-    _cache_max_size = 10
+    # 所有实例共享的回答缓存，避免短时间内重复请求（首次使用时按配置创建）
+    _request_cache: Optional[LRUCache] = None
 
-    # 初始化OpenAI客户端
+    # 初始化豆包异步客户端
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         api_key = self.get_config("api.volcano_generate_api_key")
@@ -149,9 +163,15 @@ class DoubaoSearchGenerationAction(BaseAction):
         if not isinstance(model_name, str):
             raise ValueError("Model name must be a string")
 
-        self.client = OpenAI(
-            base_url="https://ark.cn-beijing.volces.com/api/v3/bots",
-            api_key=api_key
+        self.client = DoubaoClient(
+            api_key=api_key,
+            base_url=resolve_base_url(self.get_config("api.base_url", DEFAULT_BASE_URL), model_name),
+            timeout=self.get_config("api.timeout", DEFAULT_TIMEOUT),
+            max_concurrency=self.get_config("api.max_concurrency", DEFAULT_MAX_CONCURRENCY),
+            rate_limit=self.get_config("api.rate_limit", DEFAULT_RATE),
+            rate_burst=self.get_config("api.rate_burst", DEFAULT_BURST),
+            rate_max_queue=self.get_config("api.rate_max_queue", DEFAULT_MAX_QUEUE),
+            model_rate_limits=self.get_config("api.rate_limits", {}),
         )
 
     async def execute(self) -> Tuple[bool, Optional[str]]:
@@ -167,42 +187,45 @@ class DoubaoSearchGenerationAction(BaseAction):
 
         query = query.strip()
 
+        # 与豆包请求并行获取Pixiv排行榜图片，省掉一次串行的网络往返
+        pixiv_task = self._start_pixiv_prefetch()
+
         try:
-            # 调用OpenAI客户端
-            completion = self.client.chat.completions.create(
-                model=self.get_config("api.model_name"),  # 从配置中读取模型名称
-                messages=[
-                    {"role": "system", "content": "你是豆包，是由字节跳动开发的 AI 人工智能助手"},
-                    {"role": "user", "content": query},
-                ],
-            )
+            cache = self._get_cache()
+            cache_key = self._get_cache_key(query, self.get_config("api.model_name"))
+            cached_content = cache.get(cache_key) if cache is not None else None
+            # 进程内缓存未命中时再查磁盘存储，重启后依然能命中
+            store = get_result_store() if cache is not None else None
+            if cached_content is None and store:
+                cached_content = await asyncio.to_thread(store.get, "doubao", cache_key)
+                if cached_content is not None:
+                    cache.set(cache_key, cached_content)
+
+            if cached_content is not None:
+                logger.info(f"{self.log_prefix} 命中回答缓存，跳过豆包请求 {cache.stats()}")
+                await self._send_full_reply(cached_content)
+                response_content = cached_content
+            elif self.get_config("stream.enabled", False):
+                # 流式模式：生成一句发一句，缩短首条消息的等待时间
+                response_content = await self._execute_streaming(query)
+            else:
+                response_content = await self._execute_full(query)
 
-            # 获取回复内容
-            response_content = completion.choices[0].message.content or ""
+            if is_debug_enabled(logger):
+                logger.debug(f"{self.log_prefix} 豆包调用指标: {self.client.metrics.snapshot()}")
 
-            # 统一使用 generator_api.rewrite_reply
-            result_status, result_message = await generator_api.rewrite_reply(
-                chat_stream=self.chat_stream,
-                reply_data={
-                    "raw_reply": response_content,
-                    "reason": "豆包LLM生成的智能回复，请优化表达后发送给用户"
-                },
-                enable_splitter=False,
-                enable_chinese_typo=False
-            )
-            # 直接发送content字符串
-            if result_status and result_message:
-                await self.send_text("找到了相关信息哦~")
-                await self.send_text(result_message.content or "回复生成失败")
-            else:
-                await self.send_text("回复生成失败")
+            if cache is not None and cached_content is None and response_content:
+                cache.set(cache_key, response_content)
+                if store:
+                    # 与进程内缓存使用同一个过期时间，否则磁盘中的回答会按 [store] 的 ttl 保留
+                    await asyncio.to_thread(
+                        store.set, "doubao", cache_key, response_content, self.get_config("cache.ttl", DEFAULT_TTL)
+                    )
 
-            # 根据配置决定是否发送Pixiv排行榜图片
-            enable_pixiv_rank50_on_search = self.get_config("components.enable_pixiv_rank50_on_search", False)
-            if enable_pixiv_rank50_on_search:
+            # 文本发出后再附上提前获取的Pixiv排行榜图片
+            if pixiv_task is not None:
                 try:
-                    from .PixivRank50 import get_pixiv_image_by_rank
-                    img_datauri = get_pixiv_image_by_rank(None)
+                    img_datauri = await pixiv_task
                     # 只取datauri的base64部分
                     if img_datauri.startswith("data:image/"):
                         base64_image = img_datauri.split(",", 1)[-1]
@@ -214,23 +237,147 @@ class DoubaoSearchGenerationAction(BaseAction):
 
             return True, response_content
 
+        except asyncio.TimeoutError:
+            logger.error(f"{self.log_prefix} 调用豆包API超时")
+            await self.send_text("哎呀，搜索超时了，请稍后再试~")
+            return False, "生成回复失败: 请求超时"
+        except asyncio.QueueFull:
+            logger.warning(f"{self.log_prefix} 豆包请求排队已满，直接拒绝")
+            await self.send_text("现在问的人有点多，请稍后再试~")
+            return False, "生成回复失败: 请求排队已满"
         except Exception as e:
             logger.error(f"{self.log_prefix} 调用OpenAI API时出错: {e}", exc_info=True)
             await self.send_text(f"哎呀，生成回复时遇到问题：{str(e)[:100]}")
             return False, f"生成回复失败: {str(e)[:100]}"
+        finally:
+            # 搜索失败或被中断时取消尚未完成的图片获取
+            if pixiv_task is not None:
+                if not pixiv_task.done():
+                    pixiv_task.cancel()
+                elif not pixiv_task.cancelled():
+                    pixiv_task.exception()
+
+    def _start_pixiv_prefetch(self) -> Optional[asyncio.Task]:
+        """根据配置在后台线程中开始获取Pixiv排行榜图片，未启用时返回 None"""
+        if not self.get_config("components.enable_pixiv_rank50_on_search", False):
+            return None
+        try:
+            from .PixivRank50 import get_pixiv_image_by_rank
+        except ImportError as e:
+            logger.warning(f"PixivRank50模块导入失败: {e}")
+            return None
+        return asyncio.create_task(asyncio.to_thread(get_pixiv_image_by_rank, None))
+
+    def _build_messages(self, query: str) -> List[Dict[str, str]]:
+        """构造发给豆包的消息列表"""
+        return [
+            {"role": "system", "content": "你是豆包，是由字节跳动开发的 AI 人工智能助手"},
+            {"role": "user", "content": query},
+        ]
+
+    async def _execute_full(self, query: str) -> str:
+        """等待完整回复，润色后一次性发送"""
+        model = self.get_config("api.model_name")  # 从配置中读取模型名称
+
+        async def fetch() -> str:
+            # 异步调用豆包，等待期间不阻塞其他聊天
+            # 用户正在等待回复，排队时优先于其他调用
+            completion = await self.client.chat(
+                model=model, messages=self._build_messages(query), priority=PRIORITY_HIGH
+            )
+            return completion.choices[0].message.content or ""
+
+        # 多个群同时问同一个问题时只请求一次豆包，各自润色发送
+        flight = get_single_flight("doubao")
+        response_content = await flight.do(self._get_cache_key(query, model), fetch)
+        if is_debug_enabled(logger):
+            logger.debug(f"{self.log_prefix} 豆包请求合并统计: {flight.stats()}")
+        await self._send_full_reply(response_content)
+        return response_content
+
+    async def _send_full_reply(self, response_content: str):
+        """润色完整回复后发送"""
+        # 统一使用 generator_api.rewrite_reply
+        result_status, result_message = await generator_api.rewrite_reply(
+            chat_stream=self.chat_stream,
+            reply_data={
+                "raw_reply": response_content,
+                "reason": "豆包LLM生成的智能回复，请优化表达后发送给用户"
+            },
+            enable_splitter=False,
+            enable_chinese_typo=False
+        )
+        # 直接发送content字符串
+        if result_status and result_message:
+            await self.send_text("找到了相关信息哦~")
+            await self.send_text(result_message.content or "回复生成失败")
+        else:
+            await self.send_text("回复生成失败")
+
+    async def _execute_streaming(self, query: str) -> str:
+        """
+        流式消费豆包回复，按句子切分后逐段发送，可选逐段润色。
+        上游流在独立任务中按 token 到达速度读完，润色与发送不占用并发名额与流的截止时间；
+        多个群同时问同一个问题时只请求一次豆包，各自从第一段开始发送。
+        """
+        rewrite_segments = self.get_config("stream.rewrite_segments", False)
+        min_chars = self.get_config("stream.min_segment_chars", DEFAULT_MIN_SEGMENT_CHARS)
+        model = self.get_config("api.model_name")
+
+        def open_stream():
+            # 用户正在等待回复，排队时优先于其他调用
+            deltas = self.client.stream_chat(
+                model=model, messages=self._build_messages(query), priority=PRIORITY_HIGH
+            )
+            return iter_sentences(deltas, min_chars=min_chars)
 
-    @classmethod
-    def _get_cache_key(cls, description: str, model: str, size: str) -> str:
-        """生成缓存键"""
-        return f"{description[:100]}|{model}|{size}"
+        flight = get_stream_flight("doubao_stream")
+        stream = flight.stream(self._get_cache_key(query, model), open_stream)
+        segments = []
+        try:
+            async for segment in stream:
+                segments.append(segment)
+                text = segment
+                if rewrite_segments:
+                    result_status, result_message = await generator_api.rewrite_reply(
+                        chat_stream=self.chat_stream,
+                        reply_data={
+                            "raw_reply": segment,
+                            "reason": "豆包LLM生成的智能回复片段，请优化表达后发送给用户，不要补充片段以外的内容"
+                        },
+                        enable_splitter=False,
+                        enable_chinese_typo=False
+                    )
+                    if result_status and result_message and result_message.content:
+                        text = result_message.content
+                await self.send_text(text)
+        finally:
+            # 润色或发送出错时立即关闭流，没有其他群在读取时随之取消上游请求、释放并发名额
+            await stream.aclose()
+        if is_debug_enabled(logger):
+            logger.debug(f"{self.log_prefix} 豆包流式请求合并统计: {flight.stats()}")
+
+        if not segments:
+            await self.send_text("回复生成失败")
+        return "".join(segments)
+
+    def _get_cache(self) -> Optional[LRUCache]:
+        """获取共享的回答缓存，未启用缓存时返回 None"""
+        if not self.get_config("cache.enabled", True):
+            return None
+        cls = type(self)
+        if cls._request_cache is None:
+            cls._request_cache = LRUCache(
+                max_size=self.get_config("cache.max_size", 10),
+                ttl=self.get_config("cache.ttl", DEFAULT_TTL),
+                max_bytes=self.get_config("cache.max_bytes", DEFAULT_MAX_BYTES),
+            )
+        return cls._request_cache
 
     @classmethod
-    def _cleanup_cache(cls):
-        """清理缓存，保持大小在限制内"""
-        if len(cls._request_cache) > cls._cache_max_size:
-            keys_to_remove = list(cls._request_cache.keys())[: -cls._cache_max_size // 2]
-            for key in keys_to_remove:
-                del cls._request_cache[key]
+    def _get_cache_key(cls, query: str, model: str) -> str:
+        """生成缓存键：模型 + 归一化后的问题"""
+        return f"{model}|{normalize_query(query)}"
 
 
 class PixivMoehuAction(BaseAction):
@@ -448,8 +595,19 @@ class BingSearchAction(BaseAction):
             return False, fail_msg
         query = query.strip()
         try:
-            from .bing_search_tool import search_bing
-            results = search_bing(query, num_results=5)
+            from .bing_search_tool import cache_stats, search_bing_async
+            from .bing_engine import strategy_stats
+            num_results = 5
+            # 合并同一时间的相同查询
+            flight = get_single_flight("bing")
+            results = await flight.do(
+                f"{num_results}|{normalize_query(query)}",
+                lambda: search_bing_async(query, num_results),
+            )
+            if is_debug_enabled(logger):
+                logger.debug(
+                    f"Bing请求合并统计: {flight.stats()}，提取策略统计: {strategy_stats()}，结果缓存统计: {cache_stats()}"
+                )
             if not results:
                 fail_msg = f"没有搜索到与“{query}”相关的内容。"
                 result_status, llm_response = await generator_api.rewrite_reply(
@@ -536,7 +694,7 @@ class DuckDuckGoSearchAction(BaseAction):
         query = self.action_data.get("query")
         # 统一使用 generator_api.rewrite_reply
         try:
-            from .duckduckgo_tool import duckduckgo_search
+            from .duckduckgo_tool import duckduckgo_search_async
         except ImportError as e:
             logger.warning(f"duckduckgo_tool模块导入失败: {e}")
             await self.send_text("DuckDuckGo搜索功能未安装或缺失，请联系管理员补全依赖。")
@@ -559,7 +717,14 @@ class DuckDuckGoSearchAction(BaseAction):
             return False, "查询内容为空"
         query = query.strip()
         try:
-            results = duckduckgo_search(query)
+            # 先走 HTML 快速路径，没有结果时才在线程中驱动浏览器；合并同一时间的相同查询
+            flight = get_single_flight("duckduckgo")
+            results = await flight.do(
+                normalize_query(query),
+                lambda: duckduckgo_search_async(query),
+            )
+            if is_debug_enabled(logger):
+                logger.debug(f"DuckDuckGo请求合并统计: {flight.stats()}")
             if not results.get("success") or not results.get("results"):
                 fail_msg = f"没有搜索到与“{query}”相关的内容。请简要解释可能的原因并安慰用户。"
                 result_status, result_message = await generator_api.rewrite_reply(
@@ -638,6 +803,11 @@ class DoubaoSearchPlugin(BasePlugin):
         "api": "API相关配置，包含火山引擎API的访问信息",
         "cache": "结果缓存配置",
         "components": "组件启用配置",
+        "stream": "流式回复配置",
+        "store": "持久化结果存储配置（SQLite）",
+        "bing_cache": "必应结果缓存配置",
+        "chrome_pool": "常驻浏览器池配置（DuckDuckGo搜索使用）",
+        "diagnostics": "搜索诊断转储配置",
         "proxy": "HTTP/HTTPS 代理配置",
     }
 
@@ -655,7 +825,7 @@ class DoubaoSearchPlugin(BasePlugin):
             "base_url": ConfigField(
                 type=str,
                 default="https://ark.cn-beijing.volces.com/api/v3",
-                description="API基础URL",
+                description="API基础URL（bot-开头的豆包应用端点会自动使用 /bots 接口）",
                 example="https://api.example.com/v1",
             ),
             "volcano_generate_api_key": ConfigField(
@@ -664,10 +834,63 @@ class DoubaoSearchPlugin(BasePlugin):
             "model_name": ConfigField(
                 type=str, default="YOUR_DOUBAO_MODEL_NAME_HERE", description="使用的模型名称", required=True
             ),
+            "timeout": ConfigField(type=float, default=60.0, description="单次豆包请求超时时间（秒）"),
+            "max_concurrency": ConfigField(type=int, default=8, description="同时进行中的豆包请求上限"),
+            "rate_limit": ConfigField(type=float, default=5.0, description="每秒允许发起的豆包请求数（令牌桶速率，0为不限）"),
+            "rate_burst": ConfigField(type=int, default=10, description="允许的突发请求数（令牌桶容量）"),
+            "rate_max_queue": ConfigField(
+                type=int, default=64, description="等待限流令牌的请求上限，超过时直接拒绝（0为不限）"
+            ),
+            "rate_limits": ConfigField(
+                type=dict,
+                default={},
+                description="按模型的限流，键为模型名称，值为 rpm（每分钟请求数）与 tpm（每分钟token数），0为不限",
+                example='{ "doubao-seed-1-6" = { rpm = 60, tpm = 100000 } }',
+            ),
         },
         "cache": {
             "enabled": ConfigField(type=bool, default=True, description="是否启用请求缓存"),
             "max_size": ConfigField(type=int, default=10, description="最大缓存数量"),
+            "ttl": ConfigField(type=float, default=600.0, description="缓存过期时间（秒）"),
+            "max_bytes": ConfigField(type=int, default=1048576, description="缓存总字节数上限"),
+        },
+        "store": {
+            "enabled": ConfigField(type=bool, default=True, description="是否启用持久化结果存储"),
+            "path": ConfigField(type=str, default="", description="SQLite数据库路径，留空使用默认路径"),
+            "ttl": ConfigField(type=float, default=43200.0, description="结果过期时间（秒）"),
+            "max_mb": ConfigField(type=int, default=64, description="数据库中结果总大小上限（MB）"),
+            "vacuum_interval": ConfigField(type=float, default=3600.0, description="后台清理与空间回收间隔（秒）"),
+        },
+        "bing_cache": {
+            "enabled": ConfigField(type=bool, default=True, description="是否启用必应结果的进程内缓存"),
+            "max_size": ConfigField(type=int, default=64, description="最大缓存查询数"),
+            "ttl": ConfigField(type=float, default=1800.0, description="缓存过期时间（秒）"),
+            "max_bytes": ConfigField(type=int, default=2097152, description="缓存总字节数上限"),
+        },
+        "chrome_pool": {
+            "size": ConfigField(type=int, default=2, description="常驻无头浏览器数量"),
+            "max_queries": ConfigField(type=int, default=50, description="每个浏览器完成多少次查询后回收重建"),
+            "max_rss_mb": ConfigField(type=int, default=800, description="浏览器进程内存上限（MB），超过后回收重建，需要psutil，0为不限"),
+            "acquire_timeout": ConfigField(type=float, default=60.0, description="所有浏览器都忙时最多等待的秒数"),
+            "max_queue": ConfigField(type=int, default=8, description="等待与执行中的浏览器搜索总数上限，超过时直接拒绝"),
+            "warm": ConfigField(type=bool, default=True, description="是否在首次使用时后台预热全部浏览器"),
+            "block_resources": ConfigField(type=bool, default=True, description="是否屏蔽图片、字体、图标与跟踪脚本以加快页面加载"),
+            "blocked_urls": ConfigField(
+                type=list,
+                default=[],
+                description="block_resources 开启时屏蔽的URL模式（支持*通配），留空使用内置列表",
+                example='["*.woff2", "*google-analytics.com*"]',
+            ),
+            "profile_root": ConfigField(
+                type=str, default="", description="浏览器用户数据目录的根目录，每个浏览器使用其下的 worker-N 子目录，留空使用 ~/chrome_profile_duckduckgo"
+            ),
+        },
+        "diagnostics": {
+            "mode": ConfigField(type=str, default="on_error", description="页面转储模式：off（关闭）、sampled（抽样）、on_error（仅失败时）"),
+            "sample_rate": ConfigField(type=int, default=20, description="sampled 模式下每多少次成功请求保存一次"),
+            "max_files": ConfigField(type=int, default=50, description="转储目录最多保留的文件数"),
+            "max_mb": ConfigField(type=int, default=20, description="转储目录总大小上限（MB）"),
+            "dump_dir": ConfigField(type=str, default="", description="转储目录，留空使用插件目录下的 debug/"),
         },
         "components": {
             "enable_search_action": ConfigField(type=bool, default=True, description="是否启用搜索Action"),
@@ -678,6 +901,11 @@ class DoubaoSearchPlugin(BasePlugin):
             "enable_pixiv_rank50_action": ConfigField(type=bool, default=True, description="是否启用Pixiv排行榜图片Action"),
             "enable_pixiv_rank50_on_search": ConfigField(type=bool, default=False, description="搜索后是否自动发送Pixiv排行榜随机图片"),
         },
+        "stream": {
+            "enabled": ConfigField(type=bool, default=False, description="是否启用流式回复（生成一句发一句）"),
+            "rewrite_segments": ConfigField(type=bool, default=False, description="流式回复时是否逐段润色（关闭时直接发送原文）"),
+            "min_segment_chars": ConfigField(type=int, default=20, description="流式切分时每段的最少字符数"),
+        },
         "proxy": {
             "use_proxy": ConfigField(type=bool, default=False, description="是否启用HTTP/HTTPS代理"),
             "proxy_url": ConfigField(type=str, default="http://127.0.0.1:7897", description="HTTP/HTTPS代理地址"),
@@ -712,3 +940,15 @@ class DoubaoSearchPlugin(BasePlugin):
             components.append((PixivRank50Action.get_action_info(), PixivRank50Action))
 
         return components
+
+    async def on_unload(self):
+        """插件卸载时写入当天的LLM调用指标，关闭共享的豆包客户端连接池、必应抓取会话与常驻浏览器"""
+        await asyncio.to_thread(get_llm_metrics().flush)
+        await close_clients()
+        from .http_client import close_sessions
+        await close_sessions()
+        try:
+            from .chrome_pool import close_chrome_pool
+        except ImportError:
+            return
+        await asyncio.to_thread(close_chrome_pool)
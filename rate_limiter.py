@@ -0,0 +1,170 @@
+"""
+令牌桶限流器
+
+用于限制发往火山引擎 API 的请求速率：
+- 令牌桶：按固定速率补充令牌，允许不超过桶容量的突发
+- 按模型限流：每个模型可单独配置每分钟请求数（rpm）与每分钟 token 数（tpm），
+  token 用量在调用结束后按实际的 total_tokens 扣除，额度透支时后续请求等待补足
+- 优先级队列：令牌不足时按优先级（数值越小越优先）、同优先级按到达顺序放行
+- 排队上限：排队的调用达到 max_queue 时直接拒绝（asyncio.QueueFull），不无限堆积
+- 等待中的调用被取消时自动出队，不占用令牌
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Dict, List, Optional, Tuple
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+DEFAULT_RATE = 5.0  # 每秒补充的令牌数
+DEFAULT_BURST = 10  # 桶容量（允许的突发请求数）
+DEFAULT_MAX_QUEUE = 64  # 排队等待令牌的调用上限
+
+
+class TokenBucket:
+    """令牌桶，非线程安全，只在事件循环中使用"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(capacity))
+        self.tokens = self.capacity
+        self._last = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """尝试取出令牌，不足时返回 False"""
+        self._refill()
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+    def time_until(self, tokens: float = 1.0) -> float:
+        """距离攒够指定数量令牌还需等待的秒数"""
+        self._refill()
+        missing = tokens - self.tokens
+        return max(0.0, missing / self.rate) if missing > 0 else 0.0
+
+    def charge(self, tokens: float) -> None:
+        """事后扣除令牌，允许扣成负数（透支），透支期间 time_until 会相应变长"""
+        self._refill()
+        self.tokens -= tokens
+
+
+class PriorityRateLimiter:
+    """
+    按优先级排队的令牌桶限流器。
+    请求桶限制请求数，rate <= 0 时不限；token 桶限制 token 用量，tpm <= 0 时不限；两者都不限时直接放行。
+    """
+
+    def __init__(
+        self,
+        rate: float = DEFAULT_RATE,
+        burst: float = DEFAULT_BURST,
+        tpm: float = 0,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+    ):
+        self.bucket = TokenBucket(rate, burst) if rate > 0 else None
+        # token 桶按分钟额度补充，容量为一分钟的额度
+        self.token_bucket = TokenBucket(tpm / 60.0, tpm) if tpm > 0 else None
+        self.enabled = self.bucket is not None or self.token_bucket is not None
+        self.max_queue = int(max_queue)
+        self.rejected = 0  # 因排队已满被拒绝的调用数
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    def _try_acquire(self) -> bool:
+        # token 额度只检查不扣除，实际用量由 charge 在调用结束后扣除
+        if self.token_bucket is not None and self.token_bucket.time_until() > 0:
+            return False
+        return self.bucket is None or self.bucket.try_acquire()
+
+    def _time_until(self) -> float:
+        waits = [bucket.time_until() for bucket in (self.bucket, self.token_bucket) if bucket is not None]
+        return max(waits) if waits else 0.0
+
+    async def acquire(self, priority: int = PRIORITY_NORMAL) -> None:
+        """
+        等待一个令牌。
+        :param priority: 优先级，PRIORITY_HIGH / PRIORITY_NORMAL / PRIORITY_LOW
+        :raises: asyncio.QueueFull 排队的调用已达到 max_queue 时抛出
+        """
+        if not self.enabled:
+            return
+        # 没有人排队且有令牌时直接放行，避免多一次调度
+        if not self._waiters and self._try_acquire():
+            return
+        if self.max_queue > 0 and self.queue_depth >= self.max_queue:
+            self.rejected += 1
+            raise asyncio.QueueFull(f"限流排队已满（{self.max_queue}）")
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.ensure_future(self._dispatch())
+        await future
+
+    async def _dispatch(self) -> None:
+        """按优先级依次放行排队的调用，令牌不足时睡到下一个令牌可用"""
+        while self._waiters:
+            # 跳过已取消的等待者
+            if self._waiters[0][2].done():
+                heapq.heappop(self._waiters)
+                continue
+            if self._try_acquire():
+                _, _, future = heapq.heappop(self._waiters)
+                future.set_result(None)
+                continue
+            await asyncio.sleep(self._time_until())
+
+    def charge(self, tokens: int) -> None:
+        """调用结束后按实际用量扣除 token 额度，未配置 tpm 时忽略"""
+        if self.token_bucket is not None and tokens:
+            self.token_bucket.charge(tokens)
+
+    @property
+    def queue_depth(self) -> int:
+        """当前排队等待令牌的调用数"""
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+
+# 按 (rate, burst, max_queue) 共享的限流器，保证多个Action实例之间的限制生效
+_limiters: Dict[Tuple[float, float, int], PriorityRateLimiter] = {}
+# 按 (模型, rpm, tpm, max_queue) 共享的模型限流器
+_model_limiters: Dict[Tuple[str, float, float, int], PriorityRateLimiter] = {}
+
+
+def get_rate_limiter(
+    rate: float = DEFAULT_RATE, burst: float = DEFAULT_BURST, max_queue: int = DEFAULT_MAX_QUEUE
+) -> PriorityRateLimiter:
+    """获取指定速率与容量的共享限流器"""
+    key = (float(rate), float(burst), int(max_queue))
+    limiter = _limiters.get(key)
+    if limiter is None:
+        limiter = PriorityRateLimiter(rate, burst, max_queue=max_queue)
+        _limiters[key] = limiter
+    return limiter
+
+
+def get_model_rate_limiter(
+    model: str, rpm: float = 0, tpm: float = 0, max_queue: int = DEFAULT_MAX_QUEUE
+) -> PriorityRateLimiter:
+    """
+    获取指定模型的共享限流器。
+    :param rpm: 每分钟请求数上限，0为不限
+    :param tpm: 每分钟 token 数上限，0为不限
+    """
+    key = (model, float(rpm), float(tpm), int(max_queue))
+    limiter = _model_limiters.get(key)
+    if limiter is None:
+        limiter = PriorityRateLimiter(rpm / 60.0, rpm, tpm=tpm, max_queue=max_queue)
+        _model_limiters[key] = limiter
+    return limiter
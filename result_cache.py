@@ -0,0 +1,145 @@
+"""
+进程内结果缓存
+
+基于 OrderedDict 的 LRU 缓存：
+- O(1) 读写与淘汰：命中时移到队尾，超限时从队首淘汰
+- 单条过期时间（TTL）：过期条目在读取时视为未命中并删除
+- 总字节数上限：按条目序列化后的大小累计，超出时淘汰最久未使用的条目
+- 命中/未命中计数，线程安全，可在多个 Action 实例之间共享
+"""
+
+import json
+import sys
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+DEFAULT_MAX_SIZE = 10  # 最大缓存条目数
+DEFAULT_TTL = 600.0  # 默认过期时间（秒）
+DEFAULT_MAX_BYTES = 1024 * 1024  # 默认总字节数上限（1MB）
+
+
+# NFKC 之后仍保留的中文标点（含繁体常用的直角引号），统一映射为对应的半角标点
+_PUNCTUATION_TABLE = str.maketrans({
+    "。": ".", "、": ",", "．": ".", "｡": ".", "､": ",",
+    "“": '"', "”": '"', "「": '"', "」": '"', "『": '"', "』": '"', "〝": '"', "〞": '"',
+    "‘": "'", "’": "'",
+    "《": "<", "》": ">", "〈": "<", "〉": ">",
+    "【": "[", "】": "]", "〔": "[", "〕": "]",
+    "—": "-", "－": "-", "～": "~", "·": " ", "・": " ",
+})
+
+
+def normalize_query(query: str) -> str:
+    """
+    归一化查询文本，作为缓存键与请求合并键：
+    全角转半角（NFKC）、中文与繁体标点转为半角标点、去掉首尾空白、合并连续空白、忽略大小写
+    """
+    text = unicodedata.normalize("NFKC", query).translate(_PUNCTUATION_TABLE)
+    return " ".join(text.split()).casefold()
+
+
+def estimate_size(value: Any) -> int:
+    """估算缓存值占用的字节数"""
+    if isinstance(value, bytes):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    try:
+        return len(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+    except (TypeError, ValueError):
+        return sys.getsizeof(value)
+
+
+class LRUCache:
+    """带 TTL 与字节上限的线程安全 LRU 缓存"""
+
+    def __init__(
+        self,
+        max_size: int = DEFAULT_MAX_SIZE,
+        ttl: float = DEFAULT_TTL,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        self.max_size = max(1, int(max_size))
+        self.ttl = float(ttl)
+        self.max_bytes = max(1, int(max_bytes))
+        # key -> (value, expires_at, size)
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """读取缓存，未命中或已过期时返回 None"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at, size = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self._bytes -= size
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        写入缓存。
+        :param ttl: 该条目的过期时间（秒），不传则使用缓存默认值
+        """
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            # 单条就超过上限，缓存它只会把其他条目全部挤掉
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else float(ttl))
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._data[key] = (value, expires_at, size)
+            self._bytes += size
+            while len(self._data) > self.max_size or self._bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._data.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        """删除指定条目"""
+        with self._lock:
+            entry = self._data.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry[2]
+
+    def clear(self) -> None:
+        """清空缓存（计数器保留）"""
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """返回命中率等统计信息"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __bool__(self) -> bool:
+        # 定义了 __len__ 后空缓存会被当作假值，`if cache:` 会把刚创建的缓存当成未启用
+        return True
@@ -0,0 +1,238 @@
+"""
+持久化搜索结果存储
+
+基于 SQLite（WAL 模式）的磁盘结果存储，重启后缓存依然有效：
+- 按 (namespace, key) 建主键索引，各搜索引擎使用各自的 namespace
+- 单条过期时间（TTL），过期条目读取时视为未命中
+- 总字节数上限，超出时按最近访问时间淘汰
+- 后台线程定期清理过期条目、回收空闲页并截断 WAL 文件
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+from .config_loader import load_plugin_config
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "..", "cache", "search_results.db")
+DEFAULT_TTL = 12 * 60 * 60  # 默认过期时间：12小时
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024  # 默认总字节数上限：64MB
+DEFAULT_VACUUM_INTERVAL = 60 * 60  # 后台维护间隔：1小时
+
+# 旧版 DuckDuckGo 文件缓存：每个查询一个以 md5 命名的 JSON 文件，从不清理
+LEGACY_DUCKDUCKGO_CACHE_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "..", "cache", "duckduckgo")
+_LEGACY_CACHE_FILE = re.compile(r"^[0-9a-f]{32}\.json$")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    namespace   TEXT NOT NULL,
+    key         TEXT NOT NULL,
+    value       TEXT NOT NULL,
+    size        INTEGER NOT NULL,
+    created_at  REAL NOT NULL,
+    expires_at  REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS idx_results_expires_at ON results (expires_at);
+CREATE INDEX IF NOT EXISTS idx_results_accessed_at ON results (accessed_at);
+"""
+
+
+class ResultStore:
+    """SQLite 结果存储，线程安全"""
+
+    def __init__(
+        self,
+        path: str = DEFAULT_DB_PATH,
+        default_ttl: float = DEFAULT_TTL,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        vacuum_interval: float = DEFAULT_VACUUM_INTERVAL,
+    ):
+        self.path = os.path.abspath(path)
+        self.default_ttl = float(default_ttl)
+        self.max_bytes = max(1, int(max_bytes))
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        # auto_vacuum 必须在建表前设置，之后才能使用增量回收
+        self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+
+        self._stop = threading.Event()
+        self._vacuum_interval = float(vacuum_interval)
+        self._maintenance_thread = None
+        if self._vacuum_interval > 0:
+            self._maintenance_thread = threading.Thread(
+                target=self._maintenance_loop, name="result-store-vacuum", daemon=True
+            )
+            self._maintenance_thread.start()
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        """读取结果，不存在或已过期时返回 None"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM results WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._delete_locked(namespace, key)
+                return None
+            self._conn.execute(
+                "UPDATE results SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                (now, namespace, key),
+            )
+        return json.loads(row[0])
+
+    def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        写入结果，值需可被 JSON 序列化。
+        :param ttl: 该条目的过期时间（秒），不传则使用默认值
+        """
+        data = json.dumps(value, ensure_ascii=False)
+        size = len(data.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        expires_at = now + (self.default_ttl if ttl is None else float(ttl))
+        with self._lock:
+            old = self._conn.execute(
+                "SELECT size FROM results WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (namespace, key, value, size, created_at, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (namespace, key, data, size, now, expires_at, now),
+            )
+            self._total_bytes += size - (old[0] if old else 0)
+            self._evict_locked()
+
+    def delete(self, namespace: str, key: str) -> None:
+        """删除指定条目"""
+        with self._lock:
+            self._delete_locked(namespace, key)
+
+    def purge_expired(self) -> int:
+        """删除所有过期条目，返回删除数量"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results WHERE expires_at <= ?", (now,)
+            ).fetchone()
+            if row[0]:
+                self._conn.execute("DELETE FROM results WHERE expires_at <= ?", (now,))
+                self._total_bytes -= row[1]
+            return row[0]
+
+    def vacuum(self) -> None:
+        """清理过期条目、回收空闲页并截断 WAL 文件"""
+        self.purge_expired()
+        with self._lock:
+            self._conn.execute("PRAGMA incremental_vacuum")
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self) -> None:
+        """停止后台维护线程并关闭数据库"""
+        self._stop.set()
+        if self._maintenance_thread is not None:
+            self._maintenance_thread.join(timeout=5)
+        with self._lock:
+            self._conn.close()
+
+    def _delete_locked(self, namespace: str, key: str) -> None:
+        row = self._conn.execute(
+            "SELECT size FROM results WHERE namespace = ? AND key = ?", (namespace, key)
+        ).fetchone()
+        if row is not None:
+            self._conn.execute("DELETE FROM results WHERE namespace = ? AND key = ?", (namespace, key))
+            self._total_bytes -= row[0]
+
+    def _evict_locked(self) -> None:
+        """超出字节上限时按最近访问时间淘汰"""
+        while self._total_bytes > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT namespace, key, size FROM results ORDER BY accessed_at LIMIT 32"
+            ).fetchall()
+            if not rows:
+                self._total_bytes = 0
+                break
+            for namespace, key, size in rows:
+                self._conn.execute("DELETE FROM results WHERE namespace = ? AND key = ?", (namespace, key))
+                self._total_bytes -= size
+                if self._total_bytes <= self.max_bytes:
+                    break
+
+    def _maintenance_loop(self) -> None:
+        while not self._stop.wait(self._vacuum_interval):
+            try:
+                self.vacuum()
+            except sqlite3.Error as e:
+                print(f"结果存储维护失败: {e}")
+
+
+def _remove_legacy_json_cache(cache_dir: str = LEGACY_DUCKDUCKGO_CACHE_DIR) -> int:
+    """
+    删除旧版文件缓存留下的 md5 JSON 文件。
+    旧文件最长只有12小时有效期，迁移进存储意义不大，直接删除；目录中的其他文件保持不动。
+    :return: 删除的文件数
+    """
+    removed = 0
+    try:
+        entries = list(os.scandir(cache_dir))
+    except OSError:
+        return 0
+    for entry in entries:
+        if entry.is_file() and _LEGACY_CACHE_FILE.match(entry.name):
+            try:
+                os.remove(entry.path)
+                removed += 1
+            except OSError as e:
+                print(f"旧缓存文件删除失败: {e}")
+    return removed
+
+
+_store: Optional[ResultStore] = None
+_store_loaded = False
+_store_lock = threading.Lock()
+
+
+def get_result_store() -> Optional[ResultStore]:
+    """
+    获取进程内共享的结果存储，按 config.toml 的 [store] 节创建。
+    :return: ResultStore，未启用或打开失败时返回 None
+    """
+    global _store, _store_loaded
+    if _store_loaded:
+        return _store
+    with _store_lock:
+        if _store_loaded:
+            return _store
+        try:
+            store_cfg = load_plugin_config('store')
+            if store_cfg.get('enabled', True):
+                _store = ResultStore(
+                    path=store_cfg.get('path') or DEFAULT_DB_PATH,
+                    default_ttl=store_cfg.get('ttl', DEFAULT_TTL),
+                    max_bytes=int(store_cfg.get('max_mb', DEFAULT_MAX_BYTES // (1024 * 1024))) * 1024 * 1024,
+                    vacuum_interval=store_cfg.get('vacuum_interval', DEFAULT_VACUUM_INTERVAL),
+                )
+                # 结果已改存到存储中，首次创建存储时清理一次旧版 JSON 文件缓存
+                removed = _remove_legacy_json_cache()
+                if removed:
+                    print(f"已清理 {removed} 个旧版 DuckDuckGo 缓存文件")
+        except Exception as e:
+            print(f"结果存储初始化失败: {e}")
+            _store = None
+        _store_loaded = True
+        return _store
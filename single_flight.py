@@ -0,0 +1,197 @@
+"""
+同查询请求合并（single-flight）
+
+同一个搜索引擎上、归一化后相同的查询如果已有请求在进行中，
+后来的调用者不再发起新的上游请求，而是等待同一个结果。
+单个等待者被取消不影响其他等待者；最后一个等待者也被取消时，上游请求随之取消。
+流式调用使用 StreamFlight：上游流只消费一次，每个调用者都从第一项开始读取全部产出。
+"""
+
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, TypeVar, Union
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """按键合并进行中的异步调用"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._waiters: Dict[Hashable, int] = {}  # 每个键上仍在等待的调用者数
+        self.leaders = 0  # 真正发起上游请求的次数
+        self.coalesced = 0  # 被合并、直接复用进行中结果的次数
+        self.abandoned = 0  # 所有等待者都已取消、上游请求被取消的次数
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        执行 func，若同键调用正在进行则等待其结果。
+        上游请求在独立任务中运行，单个调用者被取消不会影响其他等待者；
+        最后一个等待者被取消时取消上游任务，使其中的浏览器、网络请求等能尽早停止。
+        :param key: 合并键，通常为归一化后的查询
+        :param func: 无参协程工厂，只有发起者会调用
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda t: self._on_done(key, t))
+        else:
+            self.coalesced += 1
+        self._waiters[key] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._inflight.get(key) is task and self._waiters[key] == 1 and not task.done():
+                # 没有其他等待者了：立即移出合并表，之后的同键调用会发起新的请求
+                self.abandoned += 1
+                del self._inflight[key]
+                del self._waiters[key]
+                task.cancel()
+            raise
+        finally:
+            if self._inflight.get(key) is task:
+                self._waiters[key] -= 1
+
+    def _on_done(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+            del self._waiters[key]
+        # 所有等待者都已取消时，标记异常已读取，避免 "exception was never retrieved" 警告
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        """返回合并计数"""
+        return {
+            "name": self.name,
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "abandoned": self.abandoned,
+            "inflight": len(self._inflight),
+        }
+
+
+class _SharedStream:
+    """一个进行中的上游流：独立任务按上游产出速度读取并缓存每一项，不受调用者处理速度影响"""
+
+    def __init__(self, source: AsyncIterator[Any]):
+        self.items: List[Any] = []
+        self.waiters = 0
+        self._changed = asyncio.Event()
+        self.task = asyncio.ensure_future(self._consume(source))
+        self.task.add_done_callback(lambda _: self._notify())
+
+    async def _consume(self, source: AsyncIterator[Any]) -> None:
+        try:
+            async for item in source:
+                self.items.append(item)
+                self._notify()
+        finally:
+            aclose = getattr(source, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def wait(self) -> None:
+        """等待下一项产出或上游结束"""
+        await self._changed.wait()
+
+
+class StreamFlight:
+    """按键合并进行中的流式调用"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, _SharedStream] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.abandoned = 0
+
+    async def stream(self, key: Hashable, func: Callable[[], AsyncIterator[T]]) -> AsyncIterator[T]:
+        """
+        读取 func 产出的流，若同键流正在进行则从第一项开始读取同一个流。
+        上游流在独立任务中读取，调用者处理得慢不会拖住上游连接与并发名额；
+        最后一个调用者提前退出（被取消、出错或 aclose）时取消上游任务。
+        :param key: 合并键，通常为归一化后的查询
+        :param func: 无参异步生成器工厂，只有发起者会调用
+        :raises: 上游流抛出的异常，在读完已产出的项之后抛出
+        """
+        shared = self._inflight.get(key)
+        if shared is None:
+            self.leaders += 1
+            shared = _SharedStream(func())
+            self._inflight[key] = shared
+            shared.task.add_done_callback(lambda t: self._on_done(key, shared))
+        else:
+            self.coalesced += 1
+        shared.waiters += 1
+        try:
+            index = 0
+            while True:
+                if index < len(shared.items):
+                    index += 1
+                    yield shared.items[index - 1]
+                elif shared.task.done():
+                    if not shared.task.cancelled() and shared.task.exception() is not None:
+                        raise shared.task.exception()
+                    return
+                else:
+                    await shared.wait()
+        finally:
+            shared.waiters -= 1
+            if shared.waiters == 0 and not shared.task.done():
+                # 没有其他调用者了：立即移出合并表并取消上游，之后的同键调用会发起新的流
+                self.abandoned += 1
+                if self._inflight.get(key) is shared:
+                    del self._inflight[key]
+                shared.task.cancel()
+
+    def _on_done(self, key: Hashable, shared: _SharedStream) -> None:
+        if self._inflight.get(key) is shared:
+            del self._inflight[key]
+        if not shared.task.cancelled():
+            shared.task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        """返回合并计数"""
+        return {
+            "name": self.name,
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "abandoned": self.abandoned,
+            "inflight": len(self._inflight),
+        }
+
+
+# 按搜索引擎划分的实例
+_flights: Dict[str, Union[SingleFlight, StreamFlight]] = {}
+
+
+def get_single_flight(name: str) -> SingleFlight:
+    """获取指定搜索引擎的 single-flight 实例"""
+    flight = _flights.get(name)
+    if flight is None:
+        flight = SingleFlight(name)
+        _flights[name] = flight
+    return flight
+
+
+def get_stream_flight(name: str) -> StreamFlight:
+    """获取指定名称的流式 single-flight 实例"""
+    flight = _flights.get(name)
+    if flight is None:
+        flight = StreamFlight(name)
+        _flights[name] = flight
+    return flight
+
+
+def all_stats() -> Dict[str, Dict[str, Any]]:
+    """返回所有搜索引擎的合并计数"""
+    return {name: flight.stats() for name, flight in _flights.items()}